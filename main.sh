@@ -1,2 +1,2 @@
 python3 src/main.py
-cd ./public && python3 -m http.server 8888
+python3 -m http.server 8888 --directory ./public
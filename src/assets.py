@@ -0,0 +1,87 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MODES = ("copy", "hardlink", "reflink")
+
+# ioctl request number for FICLONE on Linux (_IOW(0x94, 9, int)).
+FICLONE = 0x40049409
+
+
+def is_up_to_date(frm: str, to: str) -> bool:
+    try:
+        dst = os.stat(to)
+    except FileNotFoundError:
+        return False
+    src = os.stat(frm)
+    if src.st_ino == dst.st_ino and src.st_dev == dst.st_dev:
+        return True
+    return src.st_size == dst.st_size and src.st_mtime_ns == dst.st_mtime_ns
+
+
+def __reflink__(frm: str, to: str) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(frm, "rb") as src, open(to, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        return False
+    shutil.copystat(frm, to)
+    return True
+
+
+def __hardlink__(frm: str, to: str) -> bool:
+    try:
+        os.link(frm, to)
+    except OSError:
+        return False
+    return True
+
+
+def sync_file(frm: str, to: str, mode: str = "copy") -> bool:
+    if is_up_to_date(frm, to):
+        return False
+    # Never write through an existing output: it may be a hardlink to a source.
+    if os.path.lexists(to):
+        os.remove(to)
+    if mode == "hardlink" and __hardlink__(frm, to):
+        return True
+    if mode == "reflink" and __reflink__(frm, to):
+        return True
+    shutil.copy2(frm, to)
+    return True
+
+
+def sync_assets(
+    jobs: list[tuple[str, str]],
+    mode: str = "copy",
+    workers: int | None = None,
+    on_synced=None,
+) -> int:
+    # on_synced(from, to) is called for every file that was actually copied.
+    if mode not in MODES:
+        raise ValueError(f"Unknown asset sync mode {mode}, expected one of {MODES}")
+
+    for directory in sorted({os.path.dirname(to) for _, to in jobs}):
+        os.makedirs(directory, exist_ok=True)
+
+    # Like --jobs, 0 picks the default for the machine.
+    if workers is not None and workers <= 0:
+        workers = None
+    if workers == 1 or len(jobs) <= 1:
+        results = [sync_file(frm, to, mode) for frm, to in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda job: sync_file(job[0], job[1], mode), jobs)
+            results = list(results)
+    if on_synced is not None:
+        for (frm, to), synced in zip(jobs, results):
+            if synced:
+                on_synced(frm, to)
+    return sum(results)
@@ -0,0 +1,331 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import corpus
+import main as site
+import textnode
+from htmlnode import LeafNode
+from htmlnode import ParentNode
+
+
+def link_heavy_paragraph(links: int, emphasis: bool = True) -> str:
+    parts = []
+    for i in range(links):
+        if emphasis:
+            parts.append(f"see [page {i}](/pages/{i}) and **bold {i}** then *it*")
+        else:
+            parts.append(f"see [page {i}](/pages/{i}) and ![img {i}](/img/{i}.png)")
+    return " ".join(parts)
+
+
+def timeit(func, arg, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_inline(sizes=(100, 1000, 5000)):
+    print("inline tokenizer: multipass vs single pass")
+    for emphasis in (True, False):
+        label = "with emphasis" if emphasis else "links only"
+        for links in sizes:
+            text = link_heavy_paragraph(links, emphasis)
+            old = timeit(textnode.text_to_textnodes_multipass, text)
+            new = timeit(textnode.text_to_textnodes, text)
+            print(
+                f"\t{label:>13} {links:>6} links: {old * 1000:9.2f} ms -> {new * 1000:9.2f} ms ({old / new:5.1f}x)"
+            )
+    bench_inline_memo()
+
+
+def __boilerplate_page__(rng: random.Random, page: int) -> str:
+    # Navigation, callouts and list items repeated on every page around a
+    # page-specific body, like most documentation sites.
+    nav = "[Home](/) | [Guide](/guide) | [API](/api) | **[Search](/search)**"
+    note = "**Note:** this page is *generated*, see [the guide](/guide) to edit it"
+    items = "\n".join([f"- [{name}](/{name}) *section*" for name in ("a", "b", "c")])
+    return "\n\n".join(
+        [f"# Page {page}", nav, corpus.paragraph(rng), items, note, nav]
+    )
+
+
+def bench_inline_memo(pages: int = 500, entries: int = 4096):
+    print(f"inline memo over {pages} pages with repeated fragments")
+    rng = random.Random(0)
+    markdown = [__boilerplate_page__(rng, page) for page in range(pages)]
+
+    def render(docs):
+        return [textnode.markdown_to_html_node(doc) for doc in docs]
+
+    def render_memoized(docs):
+        # A fresh memo per run, so every run starts cold like a real build.
+        textnode.set_inline_memo(entries)
+        return render(docs)
+
+    off = timeit(render, markdown)
+    try:
+        on = timeit(render_memoized, markdown)
+        memo = textnode.inline_memo_info()
+    finally:
+        textnode.set_inline_memo(None)
+    rate = memo.hits / (memo.hits + memo.misses)
+    print(
+        f"\t{'off':>4} {off * 1000:9.2f} ms  {'on':>4} {on * 1000:9.2f} ms ({off / on:5.1f}x, {rate:.0%} hits)"
+    )
+
+
+RECOGNIZER_SAMPLES = {
+    "heading": "## A heading with a few words",
+    "code": "```\nfor line in lines:\n    print(line)\n```",
+    "quote": "> quoted line\n> another quoted line",
+    "ulist": "- first item\n- second item\n* third item",
+    "olist": "1. first item\n2. second item\n3. third item",
+    "paragraph": "Plain paragraph text\nthat spans two lines.",
+}
+
+
+def bench_recognizers(count: int = 20000) -> dict[str, float]:
+    results = {}
+    print("block recognizers (million calls/s)")
+    for name, sample in RECOGNIZER_SAMPLES.items():
+        blocks = [sample] * count
+        elapsed = timeit(lambda bs: list(map(textnode.block_to_block_type, bs)), blocks)
+        results[f"classify.{name}"] = count / elapsed / 1e6
+        print(f"\t{name:<16} {count / elapsed / 1e6:8.2f}")
+
+    text = link_heavy_paragraph(20, emphasis=False)
+    for name, func in (
+        ("extract_images", textnode.extract_markdown_images),
+        ("extract_links", textnode.extract_markdown_links),
+    ):
+        elapsed = timeit(lambda t: [func(t) for _ in range(count // 10)], text)
+        results[name] = count / 10 / elapsed / 1e6
+        print(f"\t{name:<16} {count / 10 / elapsed / 1e6:8.2f}")
+    return results
+
+
+def __documents__(scale: int) -> dict[str, str]:
+    rng = random.Random(0)
+    return {
+        "deep_blockquote": "\n\n".join(
+            [corpus.deep_blockquote(rng, 40) for _ in range(5 * scale)]
+        ),
+        "long_list": corpus.long_list(rng, 2000 * scale),
+        "link_dense": "\n\n".join(
+            [corpus.link_dense_paragraph(rng, 200) for _ in range(10 * scale)]
+        ),
+        "code_block": corpus.code_block(rng, 5000 * scale),
+        "mixed": corpus.document(rng, 400 * scale),
+    }
+
+
+def bench_parser(scale: int = 1) -> dict[str, float]:
+    results = {}
+    print("markdown_to_html_node / to_html throughput (MB/s)")
+    for name, markdown in __documents__(scale).items():
+        size = len(markdown.encode()) / 1e6
+        parse = timeit(textnode.markdown_to_html_node, markdown)
+        node = textnode.markdown_to_html_node(markdown)
+        render = timeit(lambda n: n.to_html(), node)
+        results[f"parse.{name}"] = size / parse
+        results[f"to_html.{name}"] = size / render
+        print(f"\t{name:<16} parse {size / parse:8.2f}  to_html {size / render:8.2f}")
+    return results
+
+
+def __wide_tree__(items: int) -> ParentNode:
+    return ParentNode(
+        "ul",
+        [
+            ParentNode("li", [LeafNode(None, f"item {i} "), LeafNode("b", "x")])
+            for i in range(items)
+        ],
+    )
+
+
+def __deep_tree__(depth: int) -> ParentNode:
+    node = ParentNode("p", [LeafNode(None, "deep")])
+    for _ in range(depth):
+        node = ParentNode("blockquote", [ParentNode("div", [node])])
+    return node
+
+
+def bench_serialize(scale: int = 1) -> dict[str, float]:
+    # The deep tree is far past the default recursion limit.
+    results = {}
+    print("ParentNode.to_html on wide and deep trees (MB/s)")
+    for name, node in (
+        ("wide", __wide_tree__(100000 * scale)),
+        ("deep", __deep_tree__(20000 * scale)),
+    ):
+        size = len(node.to_html().encode()) / 1e6
+        elapsed = timeit(lambda n: n.to_html(), node)
+        results[f"serialize.{name}"] = size / elapsed
+        print(f"\t{name:<16} {size / elapsed:8.2f}")
+    return results
+
+
+def bench_build(pages: int = 200) -> dict[str, float]:
+    print(f"full main() pipeline over {pages} generated page(s)")
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        static = os.path.join(tmp, "static")
+        os.makedirs(static)
+        corpus.write_tree(content, pages)
+        template = os.path.join(tmp, "template.html")
+        with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title><article>{{ Content }}</article>")
+        argv = [
+            "--content",
+            content,
+            "--static",
+            static,
+            "--template",
+            template,
+            "--out",
+            os.path.join(tmp, "public"),
+            # Keep the project's own build state out of it and start cold.
+            "--manifest",
+            os.path.join(tmp, ".ssg", "manifest.json"),
+            "--cache-dir",
+            os.path.join(tmp, ".ssg", "cache"),
+        ]
+        # The corpus links at pages it does not generate; the build's
+        # broken-link report would bury the results.
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            site.main(argv)
+        elapsed = time.perf_counter() - start
+    print(f"\t{pages / elapsed:8.1f} pages/s")
+    return {"build.pages_per_s": pages / elapsed}
+
+
+class DictNode:
+    # The node layout before __slots__: same fields, stored in a __dict__.
+    def __init__(self, tag, value, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def __allocated__(func) -> int:
+    tracemalloc.start()
+    try:
+        result = func()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def __count_nodes__(node) -> int:
+    count = 1
+    for child in node.children or []:
+        count += __count_nodes__(child)
+    return count
+
+
+def bench_memory(count: int = 100000, scale: int = 1) -> dict[str, float]:
+    print("node memory (bytes per node)")
+    slotted = __allocated__(lambda: [LeafNode("a", "x") for _ in range(count)])
+    dict_based = __allocated__(lambda: [DictNode("a", "x") for _ in range(count)])
+    print(f"\t{'LeafNode':<16} {slotted / count:8.1f}")
+    print(f"\t{'dict-based node':<16} {dict_based / count:8.1f}")
+
+    markdown = corpus.document(random.Random(0), 2000 * scale)
+    node = textnode.markdown_to_html_node(markdown)
+    nodes = __count_nodes__(node)
+    del node
+    size = __allocated__(lambda: textnode.markdown_to_html_node(markdown))
+    print(f"\t{'document tree':<16} {size / nodes:8.1f} ({nodes} nodes)")
+    return {"mem.nodes_per_kb": nodes * 1000 / size}
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float):
+    regressions = []
+    for name, value in sorted(results.items()):
+        if name not in baseline:
+            continue
+        change = value / baseline[name] - 1
+        print(f"\t{name:<28} {baseline[name]:10.2f} -> {value:10.2f} ({change:+.1%})")
+        if change < -tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Static site generator benchmarks.")
+    parser.add_argument("--scale", type=int, default=1, help="corpus size multiplier")
+    parser.add_argument("--pages", type=int, default=200, help="pages to build")
+    parser.add_argument(
+        "--inline", action="store_true", help="also run the inline benchmarks"
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="also run the memory benchmarks"
+    )
+    parser.add_argument(
+        "--serialize",
+        action="store_true",
+        help="also run the to_html benchmarks on wide and deep trees",
+    )
+    parser.add_argument(
+        "--recognizers",
+        action="store_true",
+        help="also run the block and inline recognizer microbenchmarks",
+    )
+    parser.add_argument("--save-baseline", default=None, help="write results here")
+    parser.add_argument("--baseline", default=None, help="compare against this file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown against the baseline before failing (default 0.25)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.inline:
+        bench_inline()
+    results = bench_parser(args.scale)
+    results.update(bench_build(args.pages))
+    if args.memory:
+        results.update(bench_memory(scale=args.scale))
+    if args.recognizers:
+        results.update(bench_recognizers())
+    if args.serialize:
+        results.update(bench_serialize(args.scale))
+
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        print(f"compared to {args.baseline}")
+        regressions = compare(results, baseline, args.tolerance)
+        if len(regressions) != 0:
+            print(f"PERFORMANCE REGRESSION: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
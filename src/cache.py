@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+
+# Bumped whenever the layout of an entry changes, so older entries are
+# never misread; they age out through prune().
+ENTRY_FORMAT = 2
+
+
+def content_key(version: int, markdown: str) -> str:
+    h = hashlib.sha256(f"{ENTRY_FORMAT}\0{version}\0".encode())
+    h.update(markdown.encode())
+    return h.hexdigest()
+
+
+# An entry is one line of JSON with what the build records about the page
+# (its links and images, and its search record once one was built), then the
+# page body as is.
+def pack(html: str, meta: dict) -> str:
+    return json.dumps(meta, separators=(",", ":")) + "\n" + html
+
+
+def unpack(entry: str) -> tuple[str, dict]:
+    meta, _, html = entry.partition("\n")
+    return html, json.loads(meta)
+
+
+class RenderCache:
+    # Rendered page bodies stored as plain files named by content hash. Writes
+    # go to a unique temp file and are renamed into place, so any number of
+    # processes can share one cache directory; readers either see a complete
+    # entry or none.
+    def __init__(self, directory: str, max_bytes: int, version: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown: str) -> str:
+        return content_key(self.version, markdown)
+
+    def __path__(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.html")
+
+    def get(self, key: str) -> str | None:
+        path = self.__path__(key)
+        try:
+            with open(path, "r") as f:
+                html = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        # Reads bump the mtime, which is what prune() evicts by. An entry
+        # evicted since it was read is still a hit.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return html
+
+    def put(self, key: str, html: str):
+        path = self.__path__(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.endswith(".html"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def prune(self) -> int:
+        entries = sorted(self.entries())
+        total = sum([size for _, size, _ in entries])
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+
+class MemoryCache:
+    # An in-process LRU of page bodies for long-running processes, with the
+    # same key/get/put/prune interface as RenderCache so either can be handed
+    # to a build. Misses fall through to an optional backing RenderCache,
+    # which also receives every put.
+    def __init__(self, max_entries: int, version: int, backing=None):
+        self.max_entries = max_entries
+        self.version = version
+        self.backing = backing
+        self.pages: OrderedDict[str, str] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, markdown: str) -> str:
+        return content_key(self.version, markdown)
+
+    def __store__(self, key: str, html: str):
+        with self.lock:
+            self.pages[key] = html
+            self.pages.move_to_end(key)
+            while len(self.pages) > self.max_entries:
+                self.pages.popitem(last=False)
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            html = self.pages.get(key)
+            if html is not None:
+                self.pages.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+        if self.backing is None:
+            return None
+        html = self.backing.get(key)
+        if html is not None:
+            self.__store__(key, html)
+        return html
+
+    def put(self, key: str, html: str):
+        self.__store__(key, html)
+        if self.backing is not None:
+            self.backing.put(key, html)
+
+    def prune(self) -> int:
+        if self.backing is None:
+            return 0
+        return self.backing.prune()
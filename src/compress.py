@@ -0,0 +1,192 @@
+import gzip
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import manifest
+import writer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FORMATS = ("gzip", "br")
+SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+# Already compressed formats gain nothing, and tiny files are not worth a
+# second request header's worth of bytes.
+COMPRESSIBLE = (
+    ".html",
+    ".css",
+    ".js",
+    ".mjs",
+    ".json",
+    ".svg",
+    ".txt",
+    ".xml",
+    ".map",
+    ".wasm",
+)
+MIN_SIZE = 256
+CHUNK_SIZE = 1 << 20
+
+
+def available(formats) -> tuple[str, ...]:
+    formats = tuple(dict.fromkeys(formats))
+    for fmt in formats:
+        if fmt not in FORMATS:
+            raise ValueError(
+                f"Unknown compression format {fmt}, expected one of {FORMATS}"
+            )
+    if "br" in formats and brotli is None:
+        print("brotli is not installed, skipping .br files")
+        formats = tuple([fmt for fmt in formats if fmt != "br"])
+    return formats
+
+
+def is_compressible(path: str) -> bool:
+    return path.endswith(COMPRESSIBLE)
+
+
+def compress_file(path: str, fp, fmt: str):
+    # Streams path into fp in chunks, so large outputs are never held in
+    # memory whole.
+    with open(path, "rb") as src:
+        chunks = iter(lambda: src.read(CHUNK_SIZE), b"")
+        if fmt == "gzip":
+            # No name and mtime=0 keep the output identical for identical input.
+            with gzip.GzipFile("", "wb", 9, fp, mtime=0) as gz:
+                for chunk in chunks:
+                    gz.write(chunk)
+            return
+        compressor = brotli.Compressor(quality=11)
+        for chunk in chunks:
+            fp.write(compressor.process(chunk))
+        fp.write(compressor.finish())
+
+
+def remove_variants(path: str):
+    for suffix in SUFFIXES.values():
+        if os.path.lexists(path + suffix):
+            os.remove(path + suffix)
+
+
+class Compressor:
+    # Writes precompressed siblings (page.html.gz, page.html.br) for outputs
+    # as the build produces them, on a thread pool; zlib and brotli release
+    # the GIL while they work. previous maps output paths, relative to root,
+    # to the content hash their siblings were made from and the formats they
+    # were made in, so an output whose bytes did not change is not compressed
+    # again. With no formats, stale siblings are removed instead.
+    def __init__(
+        self, root: str, formats, previous: dict, threads: int | None = None
+    ):
+        self.root = root
+        self.formats = tuple(formats)
+        self.recorded = sorted(self.formats)
+        self.previous = previous
+        self.digests: dict[str, str] = {}
+        self.submitted: set[str] = set()
+        self.compressed = 0
+        self.__lock__ = threading.Lock()
+        # Like --jobs, 0 picks the default for the machine.
+        if threads is not None and threads <= 0:
+            threads = None
+        self.__executor__ = ThreadPoolExecutor(max_workers=threads)
+        self.__futures__ = []
+
+    def submit(self, path: str):
+        key = os.path.relpath(path, self.root)
+        future = self.__executor__.submit(self.__compress__, path, key)
+        with self.__lock__:
+            self.submitted.add(key)
+            self.__futures__.append(future)
+
+    def __compress__(self, path: str, key: str):
+        if len(self.formats) == 0:
+            remove_variants(path)
+            return
+        if not is_compressible(path) or os.path.getsize(path) < MIN_SIZE:
+            remove_variants(path)
+            return
+        digest = manifest.hash_file(path)
+        with self.__lock__:
+            self.digests[key] = {"hash": digest, "formats": self.recorded}
+        previous = self.previous.get(key)
+        up_to_date = (
+            previous is not None
+            and previous["hash"] == digest
+            and previous["formats"] == self.recorded
+            and self.__has_siblings__(path)
+        )
+        if up_to_date:
+            return
+        for fmt, suffix in SUFFIXES.items():
+            if fmt not in self.formats:
+                if os.path.lexists(path + suffix):
+                    os.remove(path + suffix)
+                continue
+            writer.atomic_write(
+                path + suffix, lambda f: compress_file(path, f, fmt), binary=True
+            )
+        with self.__lock__:
+            self.compressed += 1
+
+    def __has_siblings__(self, path: str) -> bool:
+        return all([os.path.exists(path + SUFFIXES[fmt]) for fmt in self.formats])
+
+    def __is_current__(self, path: str, key: str) -> bool:
+        previous = self.previous.get(key)
+        if len(self.formats) == 0:
+            return previous is None
+        if not is_compressible(path):
+            return True
+        if previous is None:
+            try:
+                return os.path.getsize(path) < MIN_SIZE
+            except FileNotFoundError:
+                return True
+        return previous["formats"] == self.recorded and self.__has_siblings__(path)
+
+    def refresh(self, paths):
+        # Outputs this build did not rewrite still get new siblings when the
+        # requested formats changed since they were compressed or a sibling
+        # went missing, and lose them when compression was turned off.
+        for path in paths:
+            key = os.path.relpath(path, self.root)
+            if key not in self.submitted and not self.__is_current__(path, key):
+                self.submit(path)
+
+    def manifest(self) -> dict[str, dict]:
+        # Hashes and formats for every output with current siblings: the ones
+        # handled in this build plus untouched outputs carried over from the
+        # last one.
+        digests = {
+            key: digest
+            for key, digest in self.previous.items()
+            if key not in self.submitted
+            and os.path.exists(os.path.join(self.root, key))
+        }
+        digests.update(self.digests)
+        return digests
+
+    def close(self) -> int:
+        try:
+            for future in self.__futures__:
+                future.result()
+        finally:
+            self.__executor__.shutdown(wait=True, cancel_futures=True)
+        return self.compressed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,93 @@
+import os
+import random
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog hobbit ring elf dwarf wizard "
+    "mountain river forest shire tower road journey fellowship council"
+).split()
+
+
+def __sentence__(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def __inline__(rng: random.Random, words: int) -> str:
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.05:
+            word = f"**{word}**"
+        elif roll < 0.1:
+            word = f"*{word}*"
+        elif roll < 0.13:
+            word = f"`{word}`"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def paragraph(rng: random.Random, words: int = 60) -> str:
+    return __inline__(rng, words)
+
+
+def link_dense_paragraph(rng: random.Random, links: int = 50) -> str:
+    parts = []
+    for i in range(links):
+        word = rng.choice(WORDS)
+        if i % 5 == 0:
+            parts.append(f"![{word}](/images/{word}{i}.png)")
+        else:
+            parts.append(f"{__sentence__(rng, 3)} [{word}](/{word}/{i})")
+    return " ".join(parts)
+
+
+def deep_blockquote(rng: random.Random, depth: int = 20) -> str:
+    lines = []
+    for level in range(1, depth + 1):
+        lines.append(">" * level + " " + __inline__(rng, 8))
+    return "\n".join(lines)
+
+
+def long_list(rng: random.Random, items: int = 200, ordered: bool = False) -> str:
+    lines = []
+    for i in range(items):
+        marker = f"{i + 1}." if ordered else "-"
+        lines.append(f"{marker} {__inline__(rng, 10)}")
+    return "\n".join(lines)
+
+
+def code_block(rng: random.Random, lines: int = 200) -> str:
+    body = "\n".join(f"    {__sentence__(rng, 6)};" for _ in range(lines))
+    return f"```\n{body}\n```"
+
+
+def document(rng: random.Random, blocks: int = 40) -> str:
+    out = [f"# {__sentence__(rng, 4)}"]
+    for i in range(blocks):
+        kind = i % 8
+        if kind == 0:
+            out.append(f"## {__sentence__(rng, 5)}")
+        elif kind == 1:
+            out.append(link_dense_paragraph(rng, 10))
+        elif kind == 2:
+            out.append(long_list(rng, 8, ordered=i % 16 == 2))
+        elif kind == 3:
+            out.append(deep_blockquote(rng, 3))
+        elif kind == 4:
+            out.append(code_block(rng, 10))
+        else:
+            out.append(paragraph(rng))
+    return "\n\n".join(out)
+
+
+def write_tree(root: str, pages: int, seed: int = 0, fanout: int = 10) -> list[str]:
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        directory = os.path.join(root, f"section{i // fanout}", f"page{i}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, "index.md")
+        with open(path, "w") as f:
+            f.write(document(rng, 12))
+        paths.append(path)
+    return paths
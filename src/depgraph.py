@@ -0,0 +1,85 @@
+import os
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+import manifest
+from htmlnode import ParentNode
+
+
+# Every page records what its output was built from: the template it was
+# filled into and the links and images text_to_textnodes found in its markdown.
+# The graph lives in the page entries of the build manifest.
+def find_references(node) -> tuple[list[str], list[str]]:
+    # LINK and IMAGE text nodes become <a href> and <img src> leaves, so the
+    # rendered tree already holds every reference in document order.
+    links = []
+    images = []
+    stack = [node]
+    while len(stack) != 0:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            stack.extend(reversed(node.children))
+        elif node.tag == "a":
+            links.append(node.props["href"])
+        elif node.tag == "img":
+            images.append(node.props["src"])
+    return links, images
+
+
+def is_dirty(
+    old: dict, new: dict, src: str, digest: str, out: str, root: str
+) -> bool:
+    # A page is rebuilt only when its own source or output changed, or the
+    # template it was last filled into has changed since.
+    entries = old["pages"]
+    if manifest.is_stale(entries, src, digest, out, root):
+        return True
+    used = entries[src].get("template")
+    return used is None or old["templates"].get(used) != new["templates"].get(used)
+
+
+def url_of(out: str) -> str:
+    return "/" + out.replace(os.sep, "/")
+
+
+def site_urls(graph: dict) -> set[str]:
+    urls = set()
+    for entries in (graph["pages"], graph["static"]):
+        for entry in entries.values():
+            url = url_of(entry["out"])
+            urls.add(url)
+            if posixpath.basename(url) == "index.html":
+                urls.add(posixpath.dirname(url))
+            elif url.endswith(".html"):
+                urls.add(url[: -len(".html")])
+    return urls
+
+
+def resolve(page_out: str, url: str) -> str | None:
+    # Returns the site path an internal reference points at, or None for
+    # external URLs and same-page anchors.
+    parts = urlsplit(url)
+    if parts.scheme != "" or parts.netloc != "" or parts.path == "":
+        return None
+    path = unquote(parts.path)
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(url_of(page_out)), path)
+    return posixpath.normpath(path).replace("//", "/")
+
+
+def references(entry: dict) -> list[str]:
+    return entry.get("links", []) + entry.get("images", [])
+
+
+def broken_links(graph: dict) -> list[tuple[str, str]]:
+    # Checked against the outputs recorded in the graph, so nothing is read
+    # back from disk.
+    urls = site_urls(graph)
+    broken = []
+    for src in sorted(graph["pages"]):
+        entry = graph["pages"][src]
+        for url in references(entry):
+            path = resolve(entry["out"], url)
+            if path is not None and path not in urls:
+                broken.append((src, url))
+    return broken
@@ -0,0 +1,42 @@
+import os
+from collections.abc import Iterator
+from fnmatch import fnmatchcase
+
+DEFAULT_INCLUDE = ("*.md",)
+
+
+def matches(rel_path: str, patterns) -> bool:
+    for pattern in patterns:
+        if fnmatchcase(rel_path, pattern):
+            return True
+    return False
+
+
+def is_page(rel_path: str, include=DEFAULT_INCLUDE, exclude=()) -> bool:
+    rel_path = rel_path.replace(os.sep, "/")
+    return matches(rel_path, include) and not matches(rel_path, exclude)
+
+
+def walk_pages(
+    base_dir: str, out_dir: str, include=DEFAULT_INCLUDE, exclude=()
+) -> Iterator[tuple[str, str]]:
+    # Paths are matched relative to base_dir with "/" separators, so
+    # "drafts/*" or "*.draft.md" work the same on every platform. A directory
+    # matching an exclude pattern is not descended into.
+    yield from __walk__(base_dir, out_dir, "", include, exclude)
+
+
+def __walk__(from_dir, to_dir, rel_dir, include, exclude):
+    with os.scandir(from_dir) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        rel_path = rel_dir + entry.name
+        to_path = os.path.join(to_dir, entry.name.replace(".md", ".html"))
+        if entry.is_dir():
+            if not matches(rel_path, exclude):
+                yield from __walk__(
+                    entry.path, to_path, rel_path + "/", include, exclude
+                )
+        elif entry.is_file():
+            if matches(rel_path, include) and not matches(rel_path, exclude):
+                yield entry.path, to_path
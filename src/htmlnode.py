@@ -1,37 +1,56 @@
+from collections.abc import Iterator
+
+
 class __BASENODE__:
+    __slots__ = ()
+
     def to_html(self) -> str:
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
         raise NotImplementedError("Not Implemented")
 
+    def write_html(self, fp):
+        fp.writelines(self.iter_html())
+
     def protp_to_html(self) -> str:
         raise NotImplementedError("Not Implemented")
 
 
 class HTMLNode(__BASENODE__):
-    def __init__(self, tag=None, value=None, children=None, props=None):
+    # Only the fields every node has; LeafNode adds a value slot and
+    # ParentNode a children slot, so neither carries one it never uses. The
+    # class attributes are what a node without the slot reads.
+    __slots__ = ("tag", "props")
+    value = None
+    children = None
+
+    def __init__(self, tag=None, props=None):
         self.tag = tag
-        self.value = value
-        self.children: list[__BASENODE__] | None = children
         self.props = props
 
     def to_html(self):
         raise NotImplementedError
 
+    def iter_html(self):
+        raise NotImplementedError
+
     def props_to_html(self):
         if self.props == None:
             return ""
 
-        s = ""
-        for k, v in self.props.items():
-            s += f' {k}="{v}"'
-        return s
+        return "".join([f' {k}="{v}"' for k, v in self.props.items()])
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ("value",)
+
     def __init__(self, tag, value, props=None):
-        super().__init__(tag, value, None, props)
+        super().__init__(tag, props)
+        self.value = value
 
     def to_html(self):
         if self.tag == None:
@@ -39,20 +58,60 @@ class LeafNode(HTMLNode):
         else:
             return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def iter_html(self):
+        yield self.to_html()
+
 
 class ParentNode(HTMLNode):
-    def __init__(self, tag, children: list[HTMLNode], props=None):
-        super().__init__(tag, None, children, props)
+    __slots__ = ("children",)
 
-    def to_html(self):
+    def __init__(self, tag, children: list[HTMLNode], props=None):
+        super().__init__(tag, props)
+        self.children = children
 
+    def __check__(self):
         if self.tag == None or self.tag == "":
             raise ValueError("Tag must be present")
 
         if self.children == None or len(self.children) == 0:
             raise ValueError("Children must be present")
-        str = f"<{self.tag}{self.props_to_html()}>"
+
+    def to_html(self):
+        # Walks the tree with an explicit stack of (children, closing tag)
+        # instead of recursing, so depth is not bounded by the recursion limit,
+        # and every tag goes into one output list. Plain leaves, the bulk of
+        # any page, are serialized inline.
+        self.__check__()
+        html = [f"<{self.tag}{self.props_to_html()}>"]
+        append = html.append
+        stack = [(iter(self.children), f"</{self.tag}>")]
+        while stack:
+            children, close = stack[-1]
+            for node in children:
+                if node.__class__ is LeafNode:
+                    if node.tag is None:
+                        append(node.value)
+                    elif node.props is None:
+                        append(f"<{node.tag}>{node.value}</{node.tag}>")
+                    else:
+                        append(node.to_html())
+                elif isinstance(node, ParentNode):
+                    node.__check__()
+                    append(f"<{node.tag}{node.props_to_html()}>")
+                    stack.append((iter(node.children), f"</{node.tag}>"))
+                    break
+                else:
+                    append(node.to_html())
+            else:
+                stack.pop()
+                append(close)
+        return "".join(html)
+
+    def iter_html(self):
+        # Each child subtree is serialized on its own, so only one of them is
+        # held in memory at a time while streaming.
+        self.__check__()
+        yield f"<{self.tag}{self.props_to_html()}>"
         for c in self.children:
-            str += c.to_html()
-        str += f"</{self.tag}>"
-        return str
+            yield c.to_html()
+        yield f"</{self.tag}>"
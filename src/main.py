@@ -1,6 +1,25 @@
+import argparse
+import functools
 import os
 import shutil
+import assets
+import cache
+import compress
+import depgraph
+import discover
+import manifest
+import parallel
+import profiler
+import publish
+import search
+import shard
+import template
 import textnode
+import writer
+
+MANIFEST_PATH = "./.ssg/manifest.json"
+CACHE_DIR = "./.ssg/cache"
+SEARCH_PATH = "./.ssg/search.json"
 
 
 def extract_title(markdown: str) -> str:
@@ -10,65 +29,698 @@ def extract_title(markdown: str) -> str:
     return lines[0][2:]
 
 
-def generate_page(from_path, template_path, dest_path):
+# What the build records about a rendered page: the links and images for the
+# dependency graph and, with a search index, the page's search record.
+def __page_info__(title: str, node, search_index: bool):
+    links, images = depgraph.find_references(node)
+    record = None
+    if search_index:
+        builder = search.RecordBuilder(title)
+        builder.add(node)
+        record = builder.record()
+    return links, images, record
+
+
+# Returns the page body, or without a render cache the tree to write it from,
+# and the page's info. Cached bodies keep their info alongside, so a cache
+# hit is never parsed again; an entry cached before a search index was wanted
+# is parsed once more to add its record.
+def __page_content__(
+    markdown: str,
+    title: str,
+    render_cache: cache.RenderCache | None,
+    search_index: bool,
+):
+    if render_cache is None:
+        node = textnode.markdown_to_html_node(markdown)
+        return node, __page_info__(title, node, search_index)
+    key = render_cache.key(markdown)
+    entry = render_cache.get(key)
+    if entry is not None:
+        content, meta = cache.unpack(entry)
+        if not search_index or "record" in meta:
+            return content, (meta["links"], meta["images"], meta.get("record"))
+    node = textnode.markdown_to_html_node(markdown)
+    if entry is None:
+        content = node.to_html()
+    info = __page_info__(title, node, search_index)
+    meta = {"links": info[0], "images": info[1]}
+    if info[2] is not None:
+        meta["record"] = info[2]
+    render_cache.put(key, cache.pack(content, meta))
+    return content, info
+
 
-    md_file = open(from_path, "r")
-    markdown = md_file.read()
+def render_markdown(
+    markdown: str,
+    template_path,
+    render_cache: cache.RenderCache | None = None,
+    search_index: bool = False,
+) -> tuple[str, tuple[list[str], list[str], dict | None]]:
     title = extract_title(markdown)
-    md_file.close()
+    content, info = __page_content__(markdown, title, render_cache, search_index)
+    if not isinstance(content, str):
+        content = content.to_html()
+    page_template = template.load_template(template_path)
+    return page_template.render(Title=title, Content=content), info
 
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
-    template = template.replace("{{ Title }}", title)
 
-    node = textnode.markdown_to_html_node(markdown)
-    content = node.to_html()
-
-    out_dir = os.path.dirname(dest_path)
-    if not os.path.exists(out_dir):
-        os.makedirs(out_dir)
-    template = template.replace("{{ Content }}", content)
-    html_file = open(dest_path, "w")
-    html_file.write(template)
-    html_file.close()
-
-
-def generate_page_recursive(base_dir: str, template_path: str, out_dir: str):
-    print(f"Generating page(s) from {base_dir} to {out_dir} using {template_path}...")
-    items = os.listdir(base_dir)
-    for item in items:
-        from_path = os.path.join(base_dir, item)
-        to_path = os.path.join(out_dir, item.replace(".md", ".html"))
-
-        if os.path.isfile(from_path):
-            generate_page(from_path, template_path, to_path)
-        else:
-            generate_page_recursive(from_path, template_path, to_path)
+def render_page(
+    from_path,
+    template_path,
+    render_cache: cache.RenderCache | None = None,
+    search_index: bool = False,
+) -> tuple[str, tuple[list[str], list[str], dict | None]]:
+    with open(from_path, "r") as md_file:
+        markdown = md_file.read()
+    return render_markdown(markdown, template_path, render_cache, search_index)
+
+
+def generate_page(
+    from_path,
+    template_path,
+    dest_path,
+    render_cache: cache.RenderCache | None = None,
+    search_index: bool = False,
+):
+    with open(from_path, "r") as md_file:
+        markdown = md_file.read()
+    title = extract_title(markdown)
+
+    page_template = template.load_template(template_path)
+    content, info = __page_content__(markdown, title, render_cache, search_index)
+
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    writer.atomic_write(
+        dest_path, lambda f: page_template.write(f, Title=title, Content=content)
+    )
+    return info
 
 
-def copy(frm: str, to: str):
-    items = os.listdir(frm)
-    print(f"In directory {frm}...")
-    for item in items:
-        print(f"\t{item}")
+class MarkdownStream:
+    # A page body rendered straight from its markdown file, one block at a
+    # time, whenever a template writes it. Only the current block and its
+    # HTML are in memory. The references and search record of the last write
+    # are kept for the build.
+    def __init__(self, path: str, title: str, search_index: bool = False):
+        self.path = path
+        self.title = title
+        self.search_index = search_index
+        self.info: tuple[list[str], list[str], dict | None] = ([], [], None)
+
+    def write_html(self, fp):
+        links = []
+        images = []
+        builder = search.RecordBuilder(self.title) if self.search_index else None
+        with open(self.path, "r") as md_file:
+            fp.write("<div>")
+            empty = True
+            for node in textnode.iter_block_nodes(md_file):
+                empty = False
+                block_links, block_images = depgraph.find_references(node)
+                links.extend(block_links)
+                images.extend(block_images)
+                if builder is not None:
+                    builder.add(node)
+                fp.write(node.to_html())
+            if empty:
+                raise ValueError("Children must be present")
+            fp.write("</div>")
+        record = builder.record() if builder is not None else None
+        self.info = links, images, record
+
+
+def generate_page_streaming(
+    from_path, template_path, dest_path, search_index: bool = False
+):
+    # For markdown files too large to hold in memory. Skips the render cache,
+    # which stores whole bodies.
+    with open(from_path, "r") as md_file:
+        title = extract_title(md_file.readline())
+    content = MarkdownStream(from_path, title, search_index)
+    page_template = template.load_template(template_path)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    writer.atomic_write(
+        dest_path, lambda f: page_template.write(f, Title=title, Content=content)
+    )
+    return content.info
+
+
+def generate_page_profiled(
+    prof: profiler.Profiler,
+    from_path,
+    template_path,
+    dest_path,
+    search_index: bool = False,
+):
+    with prof.page(from_path):
+        with prof.stage("read"):
+            with open(from_path, "r") as md_file:
+                markdown = md_file.read()
+        with prof.stage("extract_title"):
+            title = extract_title(markdown)
+        with prof.stage("markdown_to_blocks"):
+            blocks = textnode.parse_blocks(markdown, classify=False)
+        with prof.stage("classify_blocks"):
+            for block in blocks:
+                textnode.classify_block(block)
+        with prof.stage("render_blocks"):
+            children = list(map(textnode.render_block, blocks))
+            node = textnode.ParentNode("div", children)
+        with prof.stage("references"):
+            info = __page_info__(title, node, search_index)
+        with prof.stage("to_html"):
+            content = node.to_html()
+        with prof.stage("template_fill"):
+            html = template.load_template(template_path).render(
+                Title=title, Content=content
+            )
+        with prof.stage("write"):
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            writer.atomic_write(dest_path, lambda f: f.write(html))
+    return info
+
+
+def __render_profiled__(
+    prof: profiler.Profiler, jobs, template_path, on_page, search_index: bool
+):
+    # Inline parsing happens deep inside the block renderers, so it is timed by
+    # swapping in a wrapped text_to_textnodes for the duration of the build.
+    text_to_textnodes = textnode.text_to_textnodes
+    textnode.text_to_textnodes = prof.wrap("inline_parse", text_to_textnodes)
+    try:
+        for frm, to in jobs:
+            info = generate_page_profiled(prof, frm, template_path, to, search_index)
+            on_page(frm, to, info)
+    finally:
+        textnode.text_to_textnodes = text_to_textnodes
+
+
+def collect_pages(
+    base_dir: str, out_dir: str, include=discover.DEFAULT_INCLUDE, exclude=()
+) -> list[tuple[str, str]]:
+    return list(discover.walk_pages(base_dir, out_dir, include, exclude))
+
+
+def collect_static(frm: str, to: str) -> list[tuple[str, str]]:
+    jobs = []
+    for item in sorted(os.listdir(frm)):
         frm_path = os.path.join(frm, item)
+        to_path = os.path.join(to, item)
         if os.path.isfile(frm_path):
-            print(f"\t\tcopying file {item}")
-            shutil.copy(frm_path, to)
+            jobs.append((frm_path, to_path))
         else:
-            destination = os.path.join(to, item)
-            os.makedirs(destination)
-            copy(frm_path, destination)
+            jobs.extend(collect_static(frm_path, to_path))
+    return jobs
+
+
+def __build_tree__(
+    content_dir: str,
+    template_path: str,
+    static_dir: str,
+    root: str,
+    old: dict,
+    workers: int,
+    chunk_size: int | None,
+    prof: profiler.Profiler | None,
+    asset_mode: str,
+    asset_workers: int | None,
+    render_cache: cache.RenderCache | None,
+    writer_threads: int,
+    include,
+    exclude,
+    shard_of: tuple[int, int] | None,
+    compress_formats: tuple[str, ...],
+    compress_threads: int | None,
+    stream_threshold: int | None,
+    search_dir: str | None,
+    old_records: dict,
+    new_records: dict,
+) -> tuple[dict, int, int, int, list[str]]:
+    new = manifest.new_manifest()
+    new["templates"][template_path] = manifest.hash_file(template_path)
+
+    static_jobs = collect_static(static_dir, root)
+    pages = discover.walk_pages(content_dir, root, include, exclude)
+    if shard_of is not None:
+        static_jobs = shard.select(static_jobs, *shard_of)
+        pages = shard.select(pages, *shard_of)
+    compressor = compress.Compressor(
+        root, compress_formats, old["compressed"], compress_threads
+    )
+    for frm, to in static_jobs:
+        new["static"][frm] = {"out": os.path.relpath(to, root)}
+
+    search_index = search_dir is not None
+    rendered = 0
+    large = []
+
+    def stale_pages():
+        # Pages are hashed and handed to the renderer as the walk finds them.
+        # Pages that are not rebuilt keep the references and search record
+        # from last time. Pages past the stream threshold are set aside for
+        # the streaming renderer instead of being read whole.
+        nonlocal rendered
+        for frm, to in pages:
+            digest = manifest.hash_file(frm)
+            out = os.path.relpath(to, root)
+            entry = {"hash": digest, "out": out, "template": template_path}
+            new["pages"][frm] = entry
+            dirty = depgraph.is_dirty(old, new, frm, digest, out, root)
+            if search_index and not search.is_current(old_records, frm, digest):
+                dirty = True
+            if not dirty:
+                entry["links"] = old["pages"][frm]["links"]
+                entry["images"] = old["pages"][frm]["images"]
+                if search_index:
+                    new_records["pages"][frm] = old_records["pages"][frm]
+                continue
+            rendered += 1
+            if stream_threshold is None or os.path.getsize(frm) < stream_threshold:
+                yield frm, to
+            else:
+                large.append((frm, to))
+
+    def record_page(frm, info):
+        entry = new["pages"][frm]
+        entry["links"], entry["images"], record = info
+        if record is not None:
+            record["hash"] = entry["hash"]
+            record["url"] = search.page_url(entry["out"])
+            new_records["pages"][frm] = record
+
+    def on_page(frm, to, info):
+        record_page(frm, info)
+        if output is None:
+            compressor.submit(to)
+
+    # Every output is handed to the compressor once it is on disk: assets as
+    # they are synced, pages as the writer threads finish them or, without
+    # writer threads, as soon as they are rendered.
+    output = None
+    with compressor:
+        copied = assets.sync_assets(
+            static_jobs,
+            asset_mode,
+            asset_workers,
+            on_synced=lambda frm, to: compressor.submit(to),
+        )
+        jobs = stale_pages()
+        if prof is None and writer_threads > 0:
+            render = functools.partial(
+                render_page, render_cache=render_cache, search_index=search_index
+            )
+            output = writer.OutputWriter(writer_threads, on_written=compressor.submit)
+            with output:
+                parallel.render_pages(
+                    render, jobs, template_path, workers, chunk_size, output, on_page
+                )
+        elif prof is None:
+            render = functools.partial(
+                generate_page, render_cache=render_cache, search_index=search_index
+            )
+            parallel.render_pages(
+                render, jobs, template_path, workers, chunk_size, on_page=on_page
+            )
+        else:
+            __render_profiled__(prof, jobs, template_path, on_page, search_index)
+
+        # One at a time, so peak memory stays bounded by one block.
+        for frm, to in large:
+            info = generate_page_streaming(frm, template_path, to, search_index)
+            record_page(frm, info)
+            compressor.submit(to)
+
+        # A shard's records only cover part of the site; the index is written
+        # once the shards are merged.
+        outputs = [
+            os.path.join(root, entry["out"])
+            for entries in (new["pages"], new["static"])
+            for entry in entries.values()
+        ]
+        if search_index and shard_of is None:
+            for path in search.write_index(new_records, old_records, root, search_dir):
+                compressor.submit(path)
+            for name in new_records["files"]:
+                outputs.append(os.path.join(root, search_dir, name))
+        else:
+            for path in search.remove_index(old_records, root):
+                compress.remove_variants(path)
+        compressor.refresh(outputs)
+    new["compressed"] = compressor.manifest()
+
+    removed = manifest.remove_orphans(old["static"], new["static"], root)
+    removed += manifest.remove_orphans(old["pages"], new["pages"], root)
+    for path in removed:
+        compress.remove_variants(path)
+    return new, rendered, copied, compressor.compressed, removed
+
+
+def build(
+    content_dir: str,
+    template_path: str,
+    static_dir: str,
+    out_dir: str,
+    incremental: bool = False,
+    manifest_path: str = MANIFEST_PATH,
+    workers: int = 1,
+    chunk_size: int | None = None,
+    prof: profiler.Profiler | None = None,
+    asset_mode: str = "copy",
+    asset_workers: int | None = None,
+    render_cache: cache.RenderCache | None = None,
+    writer_threads: int = 0,
+    include=discover.DEFAULT_INCLUDE,
+    exclude=(),
+    staging: bool = True,
+    shard_of: tuple[int, int] | None = None,
+    compress_formats=(),
+    compress_threads: int | None = None,
+    stream_threshold: int | None = None,
+    search_dir: str | None = None,
+    search_path: str = SEARCH_PATH,
+):
+    compress_formats = compress.available(compress_formats)
+    if shard_of is not None:
+        out_dir, manifest_path = shard.shard_paths(out_dir, manifest_path, *shard_of)
+        search_path = shard.shard_file(search_path, *shard_of)
+
+    old = manifest.new_manifest()
+    old_records = search.new_records()
+    current = publish.current_release(out_dir)
+    if incremental and current is not None:
+        old = manifest.load_manifest(manifest_path)
+        old_records = search.load_records(search_path)
+    new_records = search.new_records()
+
+    # With staging the site is built into a fresh release directory while the
+    # old one keeps being served, then published with a single symlink flip.
+    if staging:
+        root = publish.new_release(out_dir)
+        if incremental and current is not None:
+            publish.clone_tree(current, root)
+    else:
+        root = out_dir
+        if os.path.islink(out_dir):
+            os.remove(out_dir)
+            if incremental and current is not None:
+                publish.clone_tree(current, out_dir)
+            # The release out_dir pointed at is no longer served; it and the
+            # rest of the releases directory are removed after the build.
+            publish.retire(out_dir, current)
+        elif not incremental and os.path.exists(out_dir):
+            shutil.rmtree(out_dir)
+        os.makedirs(out_dir, exist_ok=True)
+
+    try:
+        new, rendered, copied, compressed, removed = __build_tree__(
+            content_dir,
+            template_path,
+            static_dir,
+            root,
+            old,
+            workers,
+            chunk_size,
+            prof,
+            asset_mode,
+            asset_workers,
+            render_cache,
+            writer_threads,
+            include,
+            exclude,
+            shard_of,
+            compress_formats,
+            compress_threads,
+            stream_threshold,
+            search_dir,
+            old_records,
+            new_records,
+        )
+    except BaseException:
+        if staging:
+            shutil.rmtree(root, ignore_errors=True)
+        raise
+
+    if staging:
+        publish.remove_in_background(publish.publish(out_dir, root))
+    else:
+        publish.remove_in_background(publish.garbage(out_dir))
+    manifest.save_manifest(new, manifest_path)
+    if search_dir is not None:
+        search.save_records(new_records, search_path)
+    elif os.path.exists(search_path):
+        os.remove(search_path)
+    if render_cache is not None:
+        render_cache.prune()
+    # A shard only sees part of the site; links are checked once merged.
+    broken = []
+    if shard_of is None:
+        broken = report_broken_links(new)
+    if len(compress_formats) != 0:
+        print(f"Compressed {compressed} file(s) as {', '.join(compress_formats)}.")
+    print(
+        f"Rendered {rendered} page(s), copied {copied} asset(s), removed {len(removed)} stale output(s)."
+    )
+    return {
+        "rendered": rendered,
+        "copied": copied,
+        "compressed": compressed,
+        "removed": len(removed),
+        "broken_links": broken,
+    }
+
+
+def report_broken_links(graph: dict) -> list[tuple[str, str]]:
+    broken = depgraph.broken_links(graph)
+    for src, url in broken:
+        print(f"Broken link in {src}: {url}")
+    return broken
+
+
+def merge(
+    out_dir: str,
+    count: int,
+    manifest_path: str = MANIFEST_PATH,
+    search_dir: str | None = None,
+    search_path: str = SEARCH_PATH,
+    compress_formats=(),
+    compress_threads: int | None = None,
+):
+    merged = shard.merge(
+        out_dir,
+        manifest_path,
+        count,
+        search_dir,
+        search_path,
+        compress.available(compress_formats),
+        compress_threads,
+    )
+    report_broken_links(merged)
+    print(
+        f"Merged {count} shard(s): {len(merged['pages'])} page(s), {len(merged['static'])} asset(s)."
+    )
+
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate a static site from markdown."
+    )
+    parser.add_argument("--content", default="./content")
+    parser.add_argument("--template", default="./template.html")
+    parser.add_argument("--static", default="./static")
+    parser.add_argument("--out", default="./public")
+    parser.add_argument(
+        "--no-staging",
+        action="store_true",
+        help="build directly into --out instead of publishing a staged release",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=None,
+        help="glob of content files to render relative to --content (default *.md)",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        help="glob of content files or directories to skip, e.g. drafts/*",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard.parse_shard,
+        default=None,
+        metavar="I/N",
+        help="build only shard I of N into its own output root next to --out",
+    )
+    parser.add_argument(
+        "--merge",
+        type=int,
+        default=None,
+        metavar="N",
+        help="combine the outputs of N built shards into --out instead of building",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=MANIFEST_PATH,
+        help="where the build state for incremental builds is kept",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rebuild pages and assets that changed since the last build",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages, 0 for one per core",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="pages handed to a worker at a time (default: derived from page count)",
+    )
+    parser.add_argument(
+        "--assets",
+        choices=assets.MODES,
+        default="copy",
+        help="how static files are synced; hardlink and reflink fall back to copy",
+    )
+    parser.add_argument(
+        "--asset-threads",
+        type=int,
+        default=None,
+        help="threads used to sync static files, 0 for the default",
+    )
+    parser.add_argument(
+        "--writer-threads",
+        type=int,
+        default=4,
+        help="background threads writing pages to disk, 0 to write from the renderer",
+    )
+    parser.add_argument(
+        "--compress",
+        action="append",
+        choices=compress.FORMATS,
+        default=[],
+        help="write precompressed .gz or .br siblings of changed outputs (repeatable)",
+    )
+    parser.add_argument(
+        "--compress-threads",
+        type=int,
+        default=None,
+        help="threads compressing outputs, 0 for the default",
+    )
+    parser.add_argument(
+        "--stream-threshold",
+        type=float,
+        default=64,
+        help="render markdown files of at least this many MB block by block",
+    )
+    parser.add_argument(
+        "--search-index",
+        nargs="?",
+        const="search",
+        default=None,
+        metavar="DIR",
+        help="write a sharded search index into DIR under --out (default search)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help="directory for cached page bodies, shared by all workers",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=512,
+        help="size limit of the page cache in MB, evicting least recently used",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always parse markdown instead of reusing cached page bodies",
+    )
+    parser.add_argument(
+        "--inline-memo",
+        type=int,
+        default=0,
+        help="memoize up to N repeated inline fragments and report hit rates "
+        "(counts cover pages rendered in this process)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every build stage and page (renders in a single process)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="number of slowest pages to list in the profile report",
+    )
+    parser.add_argument(
+        "--profile-json",
+        default=None,
+        help="write the profile report as JSON to this path",
+    )
+    return parser.parse_args(argv)
 
-def main():
-    if os.path.exists("./public"):
-        shutil.rmtree("./public")
-        os.mkdir("./public")
 
-    copy("./static", "./public")
-    generate_page_recursive("./content", "./template.html", "./public")
+def main(argv=None):
+    args = parse_args(argv)
+    if args.merge is not None:
+        merge(
+            args.out,
+            args.merge,
+            args.manifest,
+            search_dir=args.search_index,
+            compress_formats=args.compress,
+            compress_threads=args.compress_threads,
+        )
+        return
+    prof = profiler.Profiler() if args.profile or args.profile_json else None
+    textnode.set_inline_memo(args.inline_memo)
+    render_cache = None
+    if not args.no_cache:
+        render_cache = cache.RenderCache(
+            args.cache_dir, args.cache_size * 1024 * 1024, textnode.PARSER_VERSION
+        )
+    build(
+        args.content,
+        args.template,
+        args.static,
+        args.out,
+        args.incremental,
+        args.manifest,
+        workers=args.jobs,
+        chunk_size=args.chunk_size,
+        prof=prof,
+        asset_mode=args.assets,
+        asset_workers=args.asset_threads,
+        render_cache=render_cache,
+        writer_threads=args.writer_threads,
+        include=args.include or discover.DEFAULT_INCLUDE,
+        exclude=args.exclude,
+        staging=not args.no_staging,
+        shard_of=args.shard,
+        compress_formats=args.compress,
+        compress_threads=args.compress_threads,
+        stream_threshold=int(args.stream_threshold * 1024 * 1024),
+        search_dir=args.search_index,
+    )
+    memo = textnode.inline_memo_info()
+    if memo is not None:
+        print(
+            f"Inline memo: {memo.hits} hit(s), {memo.misses} miss(es), {memo.currsize}/{memo.maxsize} entries."
+        )
+    if prof is not None:
+        prof.print_report(args.profile_top)
+        if args.profile_json is not None:
+            prof.write_json(args.profile_json)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 5
+
+
+def new_manifest() -> dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "templates": {},
+        "pages": {},
+        "static": {},
+        "compressed": {},
+    }
+
+
+def hash_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return new_manifest()
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return new_manifest()
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return new_manifest()
+    return manifest
+
+
+def save_manifest(manifest: dict, path: str):
+    directory = os.path.dirname(path)
+    if directory != "":
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# Output paths are stored relative to the output root, so the same manifest
+# applies whichever staging directory a build writes into.
+def is_stale(entries: dict, src: str, digest: str, out: str, root: str) -> bool:
+    entry = entries.get(src)
+    if entry is None:
+        return True
+    if entry["hash"] != digest or entry["out"] != out:
+        return True
+    return not os.path.exists(os.path.join(root, out))
+
+
+def __prune_empty_dirs__(path: str, root: str):
+    root = os.path.abspath(root)
+    directory = os.path.dirname(os.path.abspath(path))
+    while directory != root and os.path.commonpath([directory, root]) == root:
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
+
+
+def remove_orphans(old_entries: dict, new_entries: dict, root: str) -> list[str]:
+    removed = []
+    for src, entry in old_entries.items():
+        current = new_entries.get(src)
+        if current is not None and current["out"] == entry["out"]:
+            continue
+        out = os.path.join(root, entry["out"])
+        if os.path.isfile(out):
+            os.remove(out)
+            removed.append(out)
+            __prune_empty_dirs__(out, root)
+    return removed
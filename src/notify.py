@@ -0,0 +1,113 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+
+# Linux inotify, called through libc so the watcher needs no extra package.
+# Elsewhere (or when the kernel refuses) Inotify() raises OSError and the
+# watcher falls back to polling.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+)
+
+__EVENT__ = struct.Struct("iIII")
+
+
+def __libc__():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError) as e:
+        raise OSError(f"inotify is not available: {e}")
+    return libc
+
+
+def __error__(path=None) -> OSError:
+    errno = ctypes.get_errno()
+    return OSError(errno, os.strerror(errno), path)
+
+
+class Inotify:
+    def __init__(self):
+        self.libc = __libc__()
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise __error__()
+        self.dirs: dict[int, str] = {}
+
+    def watch(self, directory: str):
+        wd = self.libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), WATCH_MASK
+        )
+        if wd < 0:
+            raise __error__(directory)
+        self.dirs[wd] = directory
+
+    def read(self, timeout: float | None) -> list[tuple[str, str, int]] | None:
+        # Returns (directory, name, mask) for each event, waiting up to timeout
+        # seconds for the first one. None means the kernel queue overflowed and
+        # events were lost.
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if len(ready) == 0:
+            return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = __EVENT__.unpack_from(data, offset)
+                offset += __EVENT__.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+                if wd not in self.dirs:
+                    continue
+                events.append((self.dirs[wd], os.fsdecode(name), mask))
+                if mask & IN_MOVE_SELF:
+                    # The watch follows the directory to its new name, where
+                    # it would report events under the old one.
+                    self.libc.inotify_rm_watch(self.fd, wd)
+                    del self.dirs[wd]
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,72 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def __run_job__(job):
+    render, frm, to, args = job
+    try:
+        return frm, to, render(*args), None
+    except Exception as e:
+        return frm, to, None, f"{type(e).__name__}: {e}"
+
+
+def __chunk_size__(job_count: int, workers: int) -> int:
+    return max(1, job_count // (workers * 4))
+
+
+def render_pages(
+    render,
+    jobs,
+    template_path: str,
+    workers: int = 1,
+    chunk_size: int | None = None,
+    output=None,
+    on_page=None,
+):
+    # Without an output writer, render(from, template, dest) writes each page
+    # itself. With one, render(from, template) returns the page's HTML and the
+    # writer's threads put it on disk while the next pages render. jobs may be
+    # a lazy iterable; the serial path renders each job as it is produced.
+    # Either way render also returns the page's references, which are passed
+    # to on_page(from, dest, references) in the parent process.
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        results = map(__run_job__, __tasks__(render, jobs, template_path, output))
+        __collect__(results, output, on_page)
+        return
+
+    jobs = list(jobs)
+    if len(jobs) == 0:
+        return
+    if chunk_size is None or chunk_size <= 0:
+        chunk_size = __chunk_size__(len(jobs), workers)
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(jobs)))
+    try:
+        tasks = __tasks__(render, jobs, template_path, output)
+        results = executor.map(__run_job__, tasks, chunksize=chunk_size)
+        __collect__(results, output, on_page)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def __tasks__(render, jobs, template_path, output):
+    for frm, to in jobs:
+        if output is None:
+            yield render, frm, to, (frm, template_path, to)
+        else:
+            yield render, frm, to, (frm, template_path)
+
+
+def __collect__(results, output, on_page):
+    for frm, to, result, error in results:
+        if error is not None:
+            raise Exception(f"Failed to generate page from {frm}: {error}")
+        if output is not None:
+            html, refs = result
+            output.submit(to, html)
+        else:
+            refs = result
+        if on_page is not None:
+            on_page(frm, to, refs)
@@ -0,0 +1,20 @@
+import re
+
+# Every pattern the parser and template engine use, compiled once at import.
+# Recognizers call match() (anchored at the start) or finditer() on these
+# instead of passing string patterns to re.findall on every call.
+
+# Inline markdown
+INLINE_DELIMITER_RE = re.compile(r"\*\*\*|\*\*|\*|`")
+IMAGE_RE = re.compile(r"!\[(.*?)\]\((.*?)\)")
+LINK_RE = re.compile(r"\[(.*?)\]\((.*?)\)")
+
+# Block markdown, matched against a single stripped line
+HEADING_RE = re.compile(r"#{1,6}\s")
+OLIST_ITEM_RE = re.compile(r"([0-9]+?)\.\s")
+
+# Templates
+PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Search index: words of two or more characters
+TERM_RE = re.compile(r"\w{2,}")
@@ -0,0 +1,81 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class Profiler:
+    def __init__(self):
+        self.stages: dict[str, list] = {}
+        self.pages: list[dict] = []
+        self.__stack__: list[list] = []
+        self.__page__: dict | None = None
+
+    @contextmanager
+    def stage(self, name: str):
+        # Stage times are exclusive: time spent in a nested stage is only
+        # counted against the nested stage.
+        frame = [time.perf_counter(), 0.0]
+        self.__stack__.append(frame)
+        try:
+            yield
+        finally:
+            self.__stack__.pop()
+            elapsed = time.perf_counter() - frame[0]
+            if len(self.__stack__) != 0:
+                self.__stack__[-1][1] += elapsed
+            self.__record__(name, elapsed - frame[1])
+
+    @contextmanager
+    def page(self, path: str):
+        self.__page__ = {"path": path, "time": 0.0, "stages": {}}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.__page__["time"] = time.perf_counter() - start
+            self.pages.append(self.__page__)
+            self.__page__ = None
+
+    def wrap(self, name: str, func):
+        def timed(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+
+        return timed
+
+    def __record__(self, name: str, elapsed: float):
+        totals = self.stages.setdefault(name, [0.0, 0])
+        totals[0] += elapsed
+        totals[1] += 1
+        if self.__page__ is not None:
+            page_stages = self.__page__["stages"]
+            page_stages[name] = page_stages.get(name, 0.0) + elapsed
+
+    def slowest_pages(self, count: int) -> list[dict]:
+        return sorted(self.pages, key=lambda p: p["time"], reverse=True)[:count]
+
+    def report(self) -> dict:
+        return {
+            "pages": len(self.pages),
+            "total": sum([p["time"] for p in self.pages]),
+            "stages": {
+                name: {"time": totals[0], "count": totals[1]}
+                for name, totals in self.stages.items()
+            },
+            "page_times": self.pages,
+        }
+
+    def print_report(self, top: int = 10):
+        report = self.report()
+        print(f"Profiled {report['pages']} page(s) in {report['total']:.3f}s")
+        print("Stage totals:")
+        stages = sorted(report["stages"].items(), key=lambda s: s[1]["time"])
+        for name, totals in reversed(stages):
+            print(f"\t{name:<20} {totals['time']:10.4f}s {totals['count']:>10} call(s)")
+        print(f"Slowest {top} page(s):")
+        for page in self.slowest_pages(top):
+            print(f"\t{page['time']:10.4f}s {page['path']}")
+
+    def write_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=1)
@@ -0,0 +1,148 @@
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+# A release that is no longer served is renamed with this suffix before it is
+# deleted, so a staging release that another build is still writing is never
+# taken for garbage.
+RETIRED_SUFFIX = ".retired"
+# Staging releases left behind by a build that was killed are collected once
+# they have not been touched for this many seconds.
+ABANDONED_AFTER = 24 * 60 * 60
+
+
+def releases_dir(out_dir: str) -> str:
+    out_dir = os.path.normpath(out_dir)
+    parent, name = os.path.split(out_dir)
+    return os.path.join(parent, f".{name}.releases")
+
+
+def new_release(out_dir: str) -> str:
+    release_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{time.monotonic_ns()}"
+    path = os.path.join(releases_dir(out_dir), release_id)
+    os.makedirs(path)
+    return path
+
+
+def current_release(out_dir: str) -> str | None:
+    if os.path.islink(out_dir):
+        target = os.path.realpath(out_dir)
+        return target if os.path.isdir(target) else None
+    if os.path.isdir(out_dir):
+        return out_dir
+    return None
+
+
+def clone_tree(src: str, dst: str):
+    # Hardlinks make the clone cheap; the build never writes through an
+    # existing output (pages are renamed into place and assets are unlinked
+    # before they are replaced), so the published release is not affected.
+    for root, dirs, files in os.walk(src):
+        rel = os.path.relpath(root, src)
+        target_root = os.path.normpath(os.path.join(dst, rel))
+        for name in dirs:
+            os.makedirs(os.path.join(target_root, name), exist_ok=True)
+        for name in files:
+            frm = os.path.join(root, name)
+            to = os.path.join(target_root, name)
+            try:
+                os.link(frm, to)
+            except OSError:
+                shutil.copy2(frm, to)
+
+
+def __flip_symlink__(out_dir: str, release: str) -> bool:
+    link_target = os.path.relpath(release, os.path.dirname(os.path.abspath(out_dir)))
+    tmp_link = f"{os.path.normpath(out_dir)}.{os.getpid()}.tmp"
+    try:
+        os.symlink(link_target, tmp_link, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        return False
+    os.replace(tmp_link, out_dir)
+    return True
+
+
+def retire(out_dir: str, release: str | None):
+    # Marks a release that out_dir no longer serves for deletion. Anything
+    # outside the releases directory, such as out_dir itself, is left alone.
+    releases = os.path.realpath(releases_dir(out_dir))
+    if release is None or os.path.dirname(os.path.realpath(release)) != releases:
+        return
+    os.rename(release, release + RETIRED_SUFFIX)
+
+
+def garbage(out_dir: str) -> list[str]:
+    # Retired releases, plus staging releases abandoned long enough ago that
+    # no build can still be writing them.
+    releases = releases_dir(out_dir)
+    if not os.path.isdir(releases):
+        return []
+    found = []
+    now = time.time()
+    current = current_release(out_dir)
+    for name in sorted(os.listdir(releases)):
+        path = os.path.join(releases, name)
+        if name.endswith(RETIRED_SUFFIX):
+            found.append(path)
+            continue
+        if current is not None and os.path.realpath(path) == current:
+            continue
+        try:
+            if now - os.stat(path).st_mtime > ABANDONED_AFTER:
+                found.append(path)
+        except FileNotFoundError:
+            pass
+    return found
+
+
+def publish(out_dir: str, release: str) -> list[str]:
+    # Returns the directories that can be deleted: the release out_dir
+    # pointed at until now and any other garbage(). Staging releases of
+    # concurrent builds are kept.
+    releases = releases_dir(out_dir)
+    previous = None
+    if os.path.islink(out_dir):
+        previous = current_release(out_dir)
+    elif os.path.isdir(out_dir):
+        # A plain directory from an older build can't be swapped atomically;
+        # move it aside once and serve through a symlink from then on.
+        name = f"old-{os.path.basename(release)}{RETIRED_SUFFIX}"
+        os.rename(out_dir, os.path.join(releases, name))
+
+    if not __flip_symlink__(out_dir, release):
+        if os.path.lexists(out_dir):
+            os.rename(out_dir, f"{release}.old{RETIRED_SUFFIX}")
+        os.rename(release, out_dir)
+
+    if previous is not None and previous != os.path.realpath(release):
+        retire(out_dir, previous)
+    return garbage(out_dir)
+
+
+def remove_in_background(paths: list[str]):
+    if len(paths) == 0:
+        return
+    # A separate process in its own session, so the build can exit without
+    # waiting for the delete and a large old tree is never removed on the
+    # critical path. It also removes the releases directory once that is
+    # empty, as after a --no-staging build.
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import os, shutil, sys\n"
+            "for p in sys.argv[1:]: shutil.rmtree(p, True)\n"
+            "try: os.rmdir(os.path.dirname(sys.argv[1]))\n"
+            "except OSError: pass",
+            *paths,
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    # Reaped by a daemon thread, which a build that exits first leaves behind.
+    threading.Thread(target=proc.wait, daemon=True).start()
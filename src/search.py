@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import posixpath
+
+import depgraph
+import writer
+from htmlnode import LeafNode, ParentNode
+from patterns import TERM_RE
+
+SEARCH_VERSION = 1
+SHARDS = 16
+HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+
+# A term in the title or a heading says more about a page than one in the body.
+TITLE_WEIGHT = 10
+HEADING_WEIGHT = 3
+
+
+def terms(text: str) -> list[str]:
+    return TERM_RE.findall(text.lower())
+
+
+def shard_of(term: str, shards: int = SHARDS) -> int:
+    # 32-bit FNV-1a over the UTF-8 bytes, simple to repeat in the browser.
+    h = 0x811C9DC5
+    for byte in term.encode():
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return h % shards
+
+
+def __plain_text__(node) -> str:
+    parts = []
+    stack = [node]
+    while len(stack) != 0:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            stack.extend(reversed(node.children))
+        elif isinstance(node, LeafNode) and node.tag != "img":
+            parts.append(node.value)
+    return "".join(parts)
+
+
+class RecordBuilder:
+    # Collects a page's search record from its rendered blocks: the title, the
+    # heading texts and a weighted count of every term. Blocks can be added
+    # one at a time, so streamed pages never hold their whole text.
+    def __init__(self, title: str):
+        self.title = title
+        self.headings: list[str] = []
+        self.counts: dict[str, int] = {}
+        self.__count__(title, TITLE_WEIGHT)
+
+    def __count__(self, text: str, weight: int):
+        counts = self.counts
+        for term in terms(text):
+            counts[term] = counts.get(term, 0) + weight
+
+    def add(self, node):
+        stack = [node]
+        while len(stack) != 0:
+            node = stack.pop()
+            if isinstance(node, ParentNode):
+                if node.tag in HEADING_TAGS:
+                    text = __plain_text__(node)
+                    self.headings.append(text)
+                    self.__count__(text, HEADING_WEIGHT)
+                else:
+                    stack.extend(reversed(node.children))
+            elif isinstance(node, LeafNode):
+                if node.tag == "img":
+                    self.__count__(node.props["alt"], 1)
+                else:
+                    self.__count__(node.value, 1)
+
+    def record(self) -> dict:
+        return {"title": self.title, "headings": self.headings, "terms": self.counts}
+
+
+def page_url(out: str) -> str:
+    url = depgraph.url_of(out)
+    if posixpath.basename(url) == "index.html":
+        return url[: -len("index.html")]
+    return url
+
+
+def new_records() -> dict:
+    return {"version": SEARCH_VERSION, "directory": None, "pages": {}, "files": {}}
+
+
+def load_records(path: str) -> dict:
+    try:
+        with open(path, "r") as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        return new_records()
+    if not isinstance(records, dict) or records.get("version") != SEARCH_VERSION:
+        return new_records()
+    return records
+
+
+def save_records(records: dict, path: str):
+    directory = os.path.dirname(path)
+    if directory != "":
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(records, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_current(records: dict, src: str, digest: str) -> bool:
+    record = records["pages"].get(src)
+    return record is not None and record["hash"] == digest
+
+
+def assign_ids(old: dict, new: dict):
+    # Pages keep their id between builds and new pages fill the lowest free
+    # ones, so one changed page leaves the other pages' postings untouched.
+    used = set()
+    for src, record in new["pages"].items():
+        previous = old["pages"].get(src)
+        if previous is not None:
+            record["id"] = previous["id"]
+            used.add(previous["id"])
+    next_id = 0
+    for src in sorted(new["pages"]):
+        record = new["pages"][src]
+        if "id" in record:
+            continue
+        while next_id in used:
+            next_id += 1
+        record["id"] = next_id
+        used.add(next_id)
+
+
+def __files__(records: dict, shards: int) -> dict[str, str]:
+    pages = records["pages"].values()
+    size = max([record["id"] for record in pages], default=-1) + 1
+    listing = [None] * size
+    postings = [{} for _ in range(shards)]
+    for record in pages:
+        listing[record["id"]] = [record["url"], record["title"], record["headings"]]
+        for term, score in record["terms"].items():
+            shard = postings[shard_of(term, shards)]
+            shard.setdefault(term, []).append([record["id"], score])
+    for shard in postings:
+        for entries in shard.values():
+            entries.sort(key=lambda entry: (-entry[1], entry[0]))
+
+    files = {
+        "index.json": {"version": SEARCH_VERSION, "shards": shards, "pages": listing}
+    }
+    for i, shard in enumerate(postings):
+        files[f"terms-{i:02x}.json"] = shard
+    return {
+        name: json.dumps(data, separators=(",", ":"), sort_keys=True)
+        for name, data in files.items()
+    }
+
+
+def write_index(
+    records: dict, previous: dict, root: str, directory: str, shards: int = SHARDS
+) -> list[str]:
+    # Writes the page listing and the term shards under root/directory.
+    # Files whose content is the same as in the previous build are skipped;
+    # returns the paths that were written.
+    assign_ids(previous, records)
+    previous_files = previous["files"]
+    if previous["directory"] != directory:
+        remove_index(previous, root)
+        previous_files = {}
+    records["directory"] = directory
+    out_dir = os.path.join(root, directory)
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for name, data in __files__(records, shards).items():
+        digest = hashlib.sha256(data.encode()).hexdigest()
+        records["files"][name] = digest
+        path = os.path.join(out_dir, name)
+        if previous_files.get(name) == digest and os.path.exists(path):
+            continue
+        writer.atomic_write(path, lambda f: f.write(data))
+        written.append(path)
+    return written
+
+
+def remove_index(previous: dict, root: str) -> list[str]:
+    removed = []
+    if previous["directory"] is None:
+        return removed
+    for name in previous["files"]:
+        path = os.path.join(root, previous["directory"], name)
+        if os.path.isfile(path):
+            os.remove(path)
+            removed.append(path)
+    out_dir = os.path.join(root, previous["directory"])
+    if os.path.isdir(out_dir) and len(os.listdir(out_dir)) == 0:
+        os.rmdir(out_dir)
+    return removed
@@ -0,0 +1,228 @@
+import argparse
+import json
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import cache
+import discover
+import main as site
+import template
+import textnode
+
+
+class Renderer:
+    # State that outlives a single request: the parsed modules, compiled
+    # templates (template.load_template) and an in-memory cache of page
+    # bodies that builds and single-page renders share.
+    def __init__(
+        self,
+        content_dir: str,
+        template_path: str,
+        static_dir: str,
+        out_dir: str,
+        render_cache: cache.MemoryCache,
+    ):
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.static_dir = static_dir
+        self.out_dir = out_dir
+        self.render_cache = render_cache
+        self.build_lock = threading.Lock()
+        self.builds = 0
+
+    def content_path(self, rel: str) -> str:
+        root = os.path.abspath(self.content_dir)
+        path = os.path.abspath(os.path.join(root, rel))
+        if os.path.commonpath([path, root]) != root:
+            raise ValueError(f"{rel} is outside the content directory")
+        return path
+
+    def render_file(self, rel: str) -> str:
+        html, _ = site.render_page(
+            self.content_path(rel), self.template_path, self.render_cache
+        )
+        return html
+
+    def render_markdown(self, markdown: str) -> str:
+        html, _ = site.render_markdown(markdown, self.template_path, self.render_cache)
+        return html
+
+    def build(self, options: dict) -> dict:
+        # Builds share the output tree and manifest, so they run one at a time;
+        # renders keep being served meanwhile.
+        with self.build_lock:
+            result = site.build(
+                self.content_dir,
+                self.template_path,
+                self.static_dir,
+                self.out_dir,
+                options.get("incremental", True),
+                render_cache=self.render_cache,
+                writer_threads=4,
+                include=options.get("include") or discover.DEFAULT_INCLUDE,
+                exclude=options.get("exclude", ()),
+            )
+            self.builds += 1
+        return result
+
+    def stats(self) -> dict:
+        stats = {
+            "hits": self.render_cache.hits,
+            "misses": self.render_cache.misses,
+            "entries": len(self.render_cache.pages),
+            "builds": self.builds,
+        }
+        memo = textnode.inline_memo_info()
+        if memo is not None:
+            stats["inline_memo"] = memo._asdict()
+        return stats
+
+
+class Handler(BaseHTTPRequestHandler):
+    # GET  /render?path=REL  render a page from the content directory
+    # POST /render           render the markdown in the request body
+    # POST /build            build the site, options as a JSON object
+    # GET  /stats            cache and build counters
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        renderer = self.server.renderer
+        if url.path == "/render":
+            rel = query.get("path", [""])[0]
+            self.__respond__(lambda: ("text/html", renderer.render_file(rel)))
+        elif url.path == "/stats":
+            stats = renderer.stats()
+            self.__respond__(lambda: ("application/json", json.dumps(stats)))
+        else:
+            self.__send__(404, "text/plain", f"Unknown endpoint {url.path}")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode()
+        renderer = self.server.renderer
+        if url.path == "/render":
+            self.__respond__(lambda: ("text/html", renderer.render_markdown(body)))
+        elif url.path == "/build":
+            self.__respond__(
+                lambda: (
+                    "application/json",
+                    json.dumps(renderer.build(json.loads(body or "{}"))),
+                )
+            )
+        else:
+            self.__send__(404, "text/plain", f"Unknown endpoint {url.path}")
+
+    def __respond__(self, handle):
+        try:
+            content_type, text = handle()
+        except Exception as e:
+            self.__send__(400, "text/plain", f"{type(e).__name__}: {e}")
+            return
+        self.__send__(200, content_type, text)
+
+    def __send__(self, status: int, content_type: str, text: str):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # A socket left behind by a server that was killed would make bind fail.
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        super().server_bind()
+
+
+def make_server(
+    renderer: Renderer,
+    host: str = "127.0.0.1",
+    port: int = 8889,
+    socket_path: str | None = None,
+):
+    if socket_path is not None:
+        server = UnixHTTPServer(socket_path, Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), Handler)
+    server.renderer = renderer
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Keep the generator loaded and render pages on request."
+    )
+    parser.add_argument("--content", default="./content")
+    parser.add_argument("--template", default="./template.html")
+    parser.add_argument("--static", default="./static")
+    parser.add_argument("--out", default="./public")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8889)
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="listen on this Unix socket instead of --host and --port",
+    )
+    parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=4096,
+        help="page bodies kept in memory, least recently used evicted first",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=site.CACHE_DIR,
+        help="on-disk page cache behind the in-memory one",
+    )
+    parser.add_argument("--cache-size", type=int, default=512)
+    parser.add_argument(
+        "--inline-memo",
+        type=int,
+        default=8192,
+        help="repeated inline fragments kept parsed in memory, 0 to disable",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    textnode.set_inline_memo(args.inline_memo)
+    render_cache = cache.MemoryCache(
+        args.cache_entries,
+        textnode.PARSER_VERSION,
+        cache.RenderCache(
+            args.cache_dir, args.cache_size * 1024 * 1024, textnode.PARSER_VERSION
+        ),
+    )
+    renderer = Renderer(
+        args.content, args.template, args.static, args.out, render_cache
+    )
+    # Compile the template before the first request instead of during it.
+    template.load_template(args.template)
+    server = make_server(renderer, args.host, args.port, args.socket)
+    where = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    print(f"Rendering on {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket is not None and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import heapq
+import os
+import shutil
+
+import compress
+import manifest
+import publish
+import search
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    index, sep, count = value.partition("/")
+    if sep == "" or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"Shard must look like i/N, got {value!r}")
+    index, count = int(index), int(count)
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard index must be between 1 and N, got {value!r}")
+    return index, count
+
+
+def shard_file(path: str, index: int, count: int) -> str:
+    base, ext = os.path.splitext(path)
+    return f"{base}.{index}-of-{count}{ext}"
+
+
+def shard_paths(
+    out_dir: str, manifest_path: str, index: int, count: int
+) -> tuple[str, str]:
+    # Every shard publishes into its own output root and keeps its own
+    # manifest, so shards can build and rebuild independently.
+    out = os.path.join(f"{os.path.normpath(out_dir)}.shards", f"{index}-of-{count}")
+    return out, shard_file(manifest_path, index, count)
+
+
+def partition(jobs: list[tuple[str, str]], count: int) -> list[list[tuple[str, str]]]:
+    # Largest files first, each onto the currently lightest shard. Ties are
+    # broken by path and shard number, so every machine that sees the same
+    # tree computes the same split.
+    weighted = sorted((-os.path.getsize(frm), frm, to) for frm, to in jobs)
+    shards = [[] for _ in range(count)]
+    loads = [(0, index) for index in range(count)]
+    for size, frm, to in weighted:
+        load, index = heapq.heappop(loads)
+        shards[index].append((frm, to))
+        # Empty files still cost a render, so nothing weighs zero.
+        heapq.heappush(loads, (load + 1 - size, index))
+    for jobs in shards:
+        jobs.sort()
+    return shards
+
+
+def select(jobs, index: int, count: int) -> list[tuple[str, str]]:
+    return partition(list(jobs), count)[index - 1]
+
+
+def merge(
+    out_dir: str,
+    manifest_path: str,
+    count: int,
+    search_dir: str | None = None,
+    search_path: str | None = None,
+    compress_formats=(),
+    compress_threads: int | None = None,
+) -> dict:
+    # Hardlinks every shard's published tree into one new release of out_dir
+    # and combines the shard manifests into the manifest at manifest_path.
+    # With search_dir, the shards' search records are combined and the index
+    # is written into the release, compressed like the shards' outputs.
+    merged = manifest.new_manifest()
+    records = search.new_records()
+    release = publish.new_release(out_dir)
+    try:
+        for index in range(1, count + 1):
+            root, path = shard_paths(out_dir, manifest_path, index, count)
+            current = publish.current_release(root)
+            if current is None or not os.path.isfile(path):
+                raise Exception(f"Shard {index}/{count} has not been built into {root}")
+            part = manifest.load_manifest(path)
+            for key in ("pages", "static"):
+                for src, entry in part[key].items():
+                    if src in merged[key]:
+                        raise Exception(f"{src} was built by more than one shard")
+                    merged[key][src] = entry
+            merged["templates"].update(part["templates"])
+            merged["compressed"].update(part["compressed"])
+            if search_dir is not None:
+                path = shard_file(search_path, index, count)
+                records["pages"].update(search.load_records(path)["pages"])
+            publish.clone_tree(current, release)
+        if search_dir is not None:
+            # The shard trees never hold an index, so every file is new to
+            # the release; ids are still kept stable from the last merge.
+            previous = search.load_records(search_path)
+            previous["directory"], previous["files"] = None, {}
+            written = search.write_index(records, previous, release, search_dir)
+            with compress.Compressor(
+                release, compress_formats, {}, compress_threads
+            ) as compressor:
+                for path in written:
+                    compressor.submit(path)
+            merged["compressed"].update(compressor.manifest())
+    except BaseException:
+        shutil.rmtree(release, ignore_errors=True)
+        raise
+
+    publish.remove_in_background(publish.publish(out_dir, release))
+    manifest.save_manifest(merged, manifest_path)
+    if search_dir is not None:
+        search.save_records(records, search_path)
+    return merged
@@ -0,0 +1,61 @@
+import os
+
+from patterns import PLACEHOLDER_RE
+
+
+class Template:
+    def __init__(self, text: str):
+        self.literals: list[str] = []
+        self.names: list[str] = []
+        self.placeholders: list[str] = []
+        start = 0
+        for m in PLACEHOLDER_RE.finditer(text):
+            self.literals.append(text[start : m.start()])
+            self.names.append(m.group(1))
+            self.placeholders.append(m.group())
+            start = m.end()
+        self.literals.append(text[start:])
+
+    def __fragments__(self, variables: dict):
+        yield self.literals[0]
+        for i in range(len(self.names)):
+            value = variables.get(self.names[i])
+            yield self.placeholders[i] if value is None else value
+            yield self.literals[i + 1]
+
+    def render(self, **variables) -> str:
+        return "".join([str(f) for f in self.__fragments__(variables)])
+
+    def write(self, fp, **variables):
+        # Values that know how to serialize themselves (HTML nodes) are
+        # streamed into fp instead of being rendered to a string first.
+        for fragment in self.__fragments__(variables):
+            if isinstance(fragment, str):
+                fp.write(fragment)
+            elif hasattr(fragment, "write_html"):
+                fragment.write_html(fp)
+            else:
+                fp.write(str(fragment))
+
+    def __repr__(self):
+        return f"Template({self.names})"
+
+
+__cache__: dict[str, tuple[int, int, Template]] = {}
+
+
+def load_template(path: str) -> Template:
+    stat = os.stat(path)
+    cached = __cache__.get(path)
+    if cached is not None:
+        mtime, size, compiled = cached
+        if mtime == stat.st_mtime_ns and size == stat.st_size:
+            return compiled
+    with open(path, "r") as f:
+        template = Template(f.read())
+    __cache__[path] = (stat.st_mtime_ns, stat.st_size, template)
+    return template
+
+
+def clear_cache():
+    __cache__.clear()
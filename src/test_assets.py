@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+import assets
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+class TestAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.out = os.path.join(self.tmp.name, "public")
+        self.jobs = []
+        for name in ("index.css", "images/a.png", "images/deep/b.png"):
+            path = os.path.join(self.src, name)
+            write(path, name)
+            self.jobs.append((path, os.path.join(self.out, name)))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sync_skips_unchanged_files(self):
+        self.assertEqual(assets.sync_assets(self.jobs, workers=4), 3)
+        self.assertEqual(read(self.jobs[2][1]), "images/deep/b.png")
+        self.assertEqual(assets.sync_assets(self.jobs, workers=4), 0)
+
+        frm, to = self.jobs[0]
+        write(frm, "changed")
+        self.assertEqual(assets.sync_assets(self.jobs), 1)
+        self.assertEqual(read(to), "changed")
+
+    def test_zero_workers_uses_the_default(self):
+        self.assertEqual(assets.sync_assets(self.jobs, workers=0), 3)
+
+    def test_hardlink(self):
+        assets.sync_assets(self.jobs, "hardlink")
+        frm, to = self.jobs[0]
+        self.assertTrue(os.path.samefile(frm, to))
+
+    def test_replacing_a_hardlinked_output_leaves_the_source_alone(self):
+        frm, to = self.jobs[0]
+        other = os.path.join(self.src, "other.css")
+        write(other, "other")
+        assets.sync_assets([(frm, to)], "hardlink")
+        assets.sync_assets([(other, to)], "copy")
+        self.assertEqual(read(frm), "index.css")
+        self.assertEqual(read(to), "other")
+
+    def test_reflink_falls_back_to_copy(self):
+        self.assertEqual(assets.sync_assets(self.jobs, "reflink"), 3)
+        frm, to = self.jobs[1]
+        self.assertEqual(read(to), read(frm))
+        self.assertTrue(assets.is_up_to_date(frm, to))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            assets.sync_assets(self.jobs, "symlink")
+
+
+if __name__ == "__main__":
+    unittest.main()
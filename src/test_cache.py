@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from cache import MemoryCache, RenderCache
+
+
+def __fill__(args):
+    directory, start = args
+    c = RenderCache(directory, 1 << 30, 1)
+    for i in range(start, start + 50):
+        c.put(c.key(f"page {i % 60}"), f"<p>{i % 60}</p>")
+    return True
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = os.path.join(self.tmp.name, "cache")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        c = RenderCache(self.dir, 1 << 20, 1)
+        key = c.key("# Title")
+        self.assertIsNone(c.get(key))
+        c.put(key, "<h1>Title</h1>")
+        self.assertEqual(c.get(key), "<h1>Title</h1>")
+        self.assertEqual((c.hits, c.misses), (1, 1))
+
+    def test_parser_version_is_part_of_the_key(self):
+        self.assertNotEqual(
+            RenderCache(self.dir, 0, 1).key("x"), RenderCache(self.dir, 0, 2).key("x")
+        )
+
+    def test_prune_evicts_least_recently_used(self):
+        c = RenderCache(self.dir, 25, 1)
+        keys = [c.key(str(i)) for i in range(4)]
+        for i, key in enumerate(keys):
+            c.put(key, "0123456789")
+            path = c.__path__(key)
+            os.utime(path, (1000 + i, 1000 + i))
+        os.utime(c.__path__(keys[0]), (5000, 5000))
+        self.assertEqual(c.prune(), 2)
+        self.assertIsNotNone(c.get(keys[0]))
+        self.assertIsNone(c.get(keys[1]))
+        self.assertIsNone(c.get(keys[2]))
+        self.assertIsNotNone(c.get(keys[3]))
+
+    def test_concurrent_writers(self):
+        with ProcessPoolExecutor(4) as executor:
+            jobs = [(self.dir, start) for start in range(0, 200, 10)]
+            self.assertTrue(all(executor.map(__fill__, jobs)))
+        c = RenderCache(self.dir, 1 << 30, 1)
+        for i in range(60):
+            self.assertEqual(c.get(c.key(f"page {i}")), f"<p>{i}</p>")
+        leftovers = [p for _, _, p in c.entries() if p.endswith(".tmp")]
+        self.assertEqual(leftovers, [])
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        c = MemoryCache(2, 1)
+        keys = [c.key(str(i)) for i in range(3)]
+        c.put(keys[0], "0")
+        c.put(keys[1], "1")
+        self.assertEqual(c.get(keys[0]), "0")
+        c.put(keys[2], "2")
+        self.assertIsNone(c.get(keys[1]))
+        self.assertEqual(list(c.pages), [keys[0], keys[2]])
+        self.assertEqual((c.hits, c.misses), (1, 1))
+
+    def test_falls_back_to_backing_cache(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backing = RenderCache(tmp, 1 << 20, 1)
+            c = MemoryCache(4, 1, backing)
+            key = c.key("# Title")
+            self.assertEqual(key, backing.key("# Title"))
+            c.put(key, "<h1>Title</h1>")
+            self.assertEqual(MemoryCache(4, 1, backing).get(key), "<h1>Title</h1>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+import compress
+import main
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestCompressor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.page = os.path.join(self.root, "post", "index.html")
+        write(self.page, "<p>hello</p>" * 100)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def compress(self, path, previous=None, formats=("gzip",)):
+        with compress.Compressor(self.root, formats, previous or {}, 2) as c:
+            c.submit(path)
+        return c
+
+    def test_writes_gzip_sibling(self):
+        c = self.compress(self.page)
+        self.assertEqual(c.compressed, 1)
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>hello</p>" * 100)
+        self.assertEqual(list(c.manifest()), [os.path.join("post", "index.html")])
+
+    def test_zero_threads_uses_the_default(self):
+        with compress.Compressor(self.root, ("gzip",), {}, 0) as c:
+            c.submit(self.page)
+        self.assertEqual(c.compressed, 1)
+
+    def test_skips_unchanged_content(self):
+        first = self.compress(self.page)
+        second = self.compress(self.page, first.manifest())
+        self.assertEqual(second.compressed, 0)
+        write(self.page, "<p>changed</p>" * 100)
+        third = self.compress(self.page, second.manifest())
+        self.assertEqual(third.compressed, 1)
+
+    def test_skips_small_and_binary_files(self):
+        small = os.path.join(self.root, "small.html")
+        image = os.path.join(self.root, "logo.png")
+        write(small, "<p>x</p>")
+        write(image, "x" * 1000)
+        for path in (small, image):
+            self.assertEqual(self.compress(path).compressed, 0)
+            self.assertFalse(os.path.exists(path + ".gz"))
+
+    def test_without_formats_stale_siblings_are_removed(self):
+        self.compress(self.page)
+        c = self.compress(self.page, formats=())
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertEqual(c.manifest(), {})
+
+    def test_carries_over_untouched_outputs(self):
+        other = os.path.join(self.root, "index.html")
+        write(other, "<p>other</p>" * 100)
+        previous = {
+            "index.html": {"hash": "abc", "formats": ["gzip"]},
+            "gone.html": {"hash": "def", "formats": ["gzip"]},
+        }
+        c = self.compress(self.page, previous)
+        self.assertEqual(sorted(c.manifest()), ["index.html", "post/index.html"])
+
+    def test_brotli_is_optional(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            formats = compress.available(["gzip", "br", "gzip"])
+        if compress.brotli is None:
+            self.assertEqual(formats, ("gzip",))
+        else:
+            self.assertEqual(formats, ("gzip", "br"))
+        with self.assertRaises(ValueError):
+            compress.available(["zstd"])
+
+
+class TestCompressedBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.out = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, ".ssg", "manifest.json")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for name in ("a", "b", "c"):
+            page = os.path.join(self.content, f"{name}.md")
+            write(page, f"# {name}\n\n" + "x " * 200)
+        write(os.path.join(self.static, "site.css"), "body { margin: 0 }\n" * 50)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, writer_threads, formats=("gzip",)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return main.build(
+                self.content,
+                self.template,
+                self.static,
+                self.out,
+                True,
+                self.manifest,
+                writer_threads=writer_threads,
+                compress_formats=formats,
+            )
+
+    def check_only_changed_outputs_are_compressed(self, writer_threads):
+        self.assertEqual(self.build(writer_threads)["compressed"], 4)
+        self.assertEqual(self.build(writer_threads)["compressed"], 0)
+        write(os.path.join(self.content, "b.md"), "# b\n\n" + "y " * 200)
+        self.assertEqual(self.build(writer_threads)["compressed"], 1)
+        with gzip.open(os.path.join(self.out, "b.html.gz"), "rt") as f:
+            self.assertIn("y y y", f.read())
+        os.remove(os.path.join(self.content, "c.md"))
+        self.build(writer_threads)
+        self.assertFalse(os.path.exists(os.path.join(self.out, "c.html.gz")))
+
+    def test_only_changed_outputs_are_compressed(self):
+        self.check_only_changed_outputs_are_compressed(0)
+
+    def test_only_changed_outputs_are_compressed_by_writer_threads(self):
+        self.check_only_changed_outputs_are_compressed(2)
+
+    def test_enabling_compression_covers_unchanged_outputs(self):
+        css = os.path.join(self.out, "site.css")
+        self.build(0, ())
+        self.assertFalse(os.path.exists(css + ".gz"))
+        self.assertEqual(self.build(0)["compressed"], 4)
+        with gzip.open(css + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "body { margin: 0 }\n" * 50)
+        self.assertEqual(self.build(0)["compressed"], 0)
+        os.remove(css + ".gz")
+        self.assertEqual(self.build(0)["compressed"], 1)
+        self.build(0, ())
+        self.assertFalse(os.path.exists(css + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
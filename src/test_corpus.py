@@ -0,0 +1,37 @@
+import os
+import random
+import tempfile
+import unittest
+
+import corpus
+import textnode
+
+
+class TestCorpus(unittest.TestCase):
+    def test_document_is_deterministic(self):
+        first = corpus.document(random.Random(7), 30)
+        second = corpus.document(random.Random(7), 30)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, corpus.document(random.Random(8), 30))
+
+    def test_generated_markdown_renders(self):
+        rng = random.Random(0)
+        for markdown in (
+            corpus.deep_blockquote(rng, 10),
+            corpus.long_list(rng, 20, ordered=True),
+            corpus.link_dense_paragraph(rng, 20),
+            corpus.code_block(rng, 20),
+        ):
+            self.assertTrue(textnode.markdown_to_html_node(markdown).to_html())
+
+    def test_write_tree(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = corpus.write_tree(tmp, 25, fanout=10)
+            self.assertEqual(len(paths), 25)
+            self.assertEqual(len(os.listdir(tmp)), 3)
+            with open(paths[0]) as f:
+                self.assertTrue(f.read().startswith("# "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import unittest
+
+import depgraph
+import textnode
+
+
+def graph(pages, static=()):
+    return {
+        "pages": {src: entry for src, entry in pages.items()},
+        "static": {f"static/{out}": {"out": out} for out in static},
+    }
+
+
+class TestDepGraph(unittest.TestCase):
+    def test_find_references(self):
+        node = textnode.markdown_to_html_node(
+            "# Title\n\n> a [quoted](/quoted) link\n\n"
+            "- ![logo](/images/logo.png) and [home](/)\n\n"
+            "```\n[not a link](/code)\n```"
+        )
+        links, images = depgraph.find_references(node)
+        self.assertEqual(links, ["/quoted", "/"])
+        self.assertEqual(images, ["/images/logo.png"])
+
+    def test_resolve(self):
+        self.assertEqual(depgraph.resolve("blog/index.html", "/majesty/"), "/majesty")
+        self.assertEqual(depgraph.resolve("blog/index.html", "post"), "/blog/post")
+        self.assertEqual(depgraph.resolve("blog/index.html", "../a#b"), "/a")
+        self.assertEqual(depgraph.resolve("blog/index.html", "/a%20b"), "/a b")
+        self.assertIsNone(depgraph.resolve("index.html", "https://example.com/"))
+        self.assertIsNone(depgraph.resolve("index.html", "mailto:me@example.com"))
+        self.assertIsNone(depgraph.resolve("index.html", "#top"))
+
+    def test_broken_links(self):
+        pages = {
+            "index.md": {
+                "out": "index.html",
+                "links": ["/majesty", "/gone", "https://example.com"],
+                "images": ["/images/logo.png", "/images/missing.png"],
+            },
+            "majesty/index.md": {
+                "out": "majesty/index.html",
+                "links": ["/", "../index.html", "/majesty/index.html"],
+                "images": [],
+            },
+        }
+        self.assertEqual(
+            depgraph.broken_links(graph(pages, ["images/logo.png"])),
+            [("index.md", "/gone"), ("index.md", "/images/missing.png")],
+        )
+
+    def test_is_dirty_follows_the_page_template(self):
+        # Any existing file will do as the page's output.
+        root, out = os.path.split(__file__)
+        old = {
+            "templates": {"t.html": "1", "u.html": "1"},
+            "pages": {"a.md": {"hash": "h", "out": out, "template": "t.html"}},
+        }
+        new = {"templates": {"t.html": "1", "u.html": "2"}, "pages": {}}
+        self.assertFalse(depgraph.is_dirty(old, new, "a.md", "h", out, root))
+        new["templates"]["t.html"] = "2"
+        self.assertTrue(depgraph.is_dirty(old, new, "a.md", "h", out, root))
+
+
+if __name__ == "__main__":
+    unittest.main()
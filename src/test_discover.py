@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+import discover
+
+
+class TestDiscover(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for name in (
+            "index.md",
+            "notes.txt",
+            "b/index.md",
+            "b/image.png",
+            "a/index.md",
+            "a/old.draft.md",
+            "drafts/wip.md",
+        ):
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("# x")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def rel(self, jobs):
+        return [os.path.relpath(frm, self.root) for frm, _ in jobs]
+
+    def test_only_markdown_is_discovered_in_sorted_order(self):
+        jobs = list(discover.walk_pages(self.root, "out"))
+        self.assertEqual(
+            self.rel(jobs),
+            [
+                os.path.join("a", "index.md"),
+                os.path.join("a", "old.draft.md"),
+                os.path.join("b", "index.md"),
+                os.path.join("drafts", "wip.md"),
+                "index.md",
+            ],
+        )
+        self.assertEqual(jobs[0][1], os.path.join("out", "a", "index.html"))
+
+    def test_exclude_files_and_directories(self):
+        jobs = discover.walk_pages(
+            self.root, "out", exclude=("drafts", "*.draft.md")
+        )
+        self.assertEqual(
+            self.rel(jobs),
+            [os.path.join("a", "index.md"), os.path.join("b", "index.md"), "index.md"],
+        )
+
+    def test_include(self):
+        jobs = discover.walk_pages(self.root, "out", include=("b/*",))
+        expected = [os.path.join("b", "image.png"), os.path.join("b", "index.md")]
+        self.assertEqual(self.rel(jobs), expected)
+
+    def test_walk_is_lazy(self):
+        jobs = discover.walk_pages(self.root, "out")
+        self.assertEqual(self.rel([next(jobs)]), [os.path.join("a", "index.md")])
+
+    def test_is_page(self):
+        self.assertTrue(discover.is_page(os.path.join("a", "b.md")))
+        self.assertFalse(discover.is_page("a.txt"))
+        self.assertFalse(discover.is_page("drafts/a.md", exclude=("drafts/*",)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode
@@ -31,3 +32,75 @@ class TestHTMLNode(unittest.TestCase):
         )
         expected = "<p><b>Bold text</b>Normal text<i>italic text</i>Normal text</p>"
         self.assertEqual(node.to_html(), expected)
+
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "a"), LeafNode("b", "bold")]),
+                LeafNode("a", "link", {"href": "/x"}),
+            ],
+        )
+        expected = '<div><p>a<b>bold</b></p><a href="/x">link</a></div>'
+        self.assertEqual("".join(node.iter_html()), expected)
+        self.assertEqual(node.to_html(), expected)
+
+    def test_write_html(self):
+        node = ParentNode("p", [LeafNode("i", "x"), LeafNode(None, "y")])
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), "<p><i>x</i>y</p>")
+
+    def test_parent_node_requires_children(self):
+        with self.assertRaises(ValueError):
+            ParentNode("p", []).to_html()
+
+    def test_nested_child_requires_children(self):
+        node = ParentNode("div", [LeafNode(None, "x"), ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_to_html_matches_recursive_serialization(self):
+        def recursive(node):
+            if isinstance(node, ParentNode):
+                inner = "".join([recursive(c) for c in node.children])
+                return f"<{node.tag}{node.props_to_html()}>{inner}</{node.tag}>"
+            return node.to_html()
+
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("ul", [ParentNode("li", [LeafNode("b", "x")])] * 3),
+                ParentNode(
+                    "p",
+                    [
+                        LeafNode(None, "a"),
+                        LeafNode("img", "", {"src": "/i.png", "alt": "i"}),
+                        ParentNode("em", [LeafNode("strong", "both")]),
+                    ],
+                    {"class": "c"},
+                ),
+                LeafNode("code", "y"),
+            ],
+        )
+        self.assertEqual(node.to_html(), recursive(node))
+
+    def test_deep_tree_does_not_recurse(self):
+        depth = 20000
+        node = LeafNode("i", "x")
+        for _ in range(depth):
+            node = ParentNode("div", [node, LeafNode(None, ".")])
+        html = node.to_html()
+        self.assertEqual(html, "<div>" * depth + "<i>x</i>" + ".</div>" * depth)
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode(), LeafNode("p", "x"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_nodes_only_have_the_slots_they_use(self):
+        leaf = LeafNode("p", "x")
+        parent = ParentNode("div", [leaf])
+        with self.assertRaises(AttributeError):
+            leaf.children = []
+        with self.assertRaises(AttributeError):
+            parent.value = "x"
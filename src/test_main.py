@@ -0,0 +1,320 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+
+import main
+import manifest
+import publish
+from cache import RenderCache
+import textnode
+from profiler import Profiler
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.out = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, ".ssg", "manifest.json")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        write(os.path.join(self.content, "post", "index.md"), "# Post\n\nBody")
+        write(os.path.join(self.static, "index.css"), "body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, incremental=True, workers=1, writer_threads=0):
+        main.build(
+            self.content,
+            self.template,
+            self.static,
+            self.out,
+            incremental,
+            self.manifest,
+            workers=workers,
+            writer_threads=writer_threads,
+        )
+
+    def test_full_build(self):
+        self.build(False)
+        self.assertEqual(
+            read(os.path.join(self.out, "index.html")),
+            "<title>Home</title><div><h1>Home</h1><p>Hello</p></div>",
+        )
+        self.assertTrue(os.path.isfile(os.path.join(self.out, "post", "index.html")))
+        self.assertTrue(os.path.isfile(os.path.join(self.out, "index.css")))
+
+    def test_non_markdown_content_is_skipped(self):
+        write(os.path.join(self.content, "notes.txt"), "no title here")
+        self.build(False)
+        self.assertFalse(os.path.exists(os.path.join(self.out, "notes.txt")))
+
+    def test_incremental_only_renders_changed_pages(self):
+        self.build()
+        index = os.path.join(self.out, "index.html")
+        post = os.path.join(self.out, "post", "index.html")
+        write(post, "untouched")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        self.build()
+        self.assertEqual(read(index), "<title>Home</title><div><h1>Home</h1><p>Changed</p></div>")
+        self.assertEqual(read(post), "untouched")
+
+    def test_incremental_template_change_renders_all(self):
+        self.build()
+        post = os.path.join(self.out, "post", "index.html")
+        write(post, "untouched")
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.build()
+        self.assertEqual(read(post), "<h1>Post</h1><div><h1>Post</h1><p>Body</p></div>")
+
+    def test_incremental_removes_deleted_sources(self):
+        self.build()
+        os.remove(os.path.join(self.content, "post", "index.md"))
+        os.remove(os.path.join(self.static, "index.css"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.out, "post")))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "index.css")))
+        self.assertTrue(os.path.isfile(os.path.join(self.out, "index.html")))
+
+    def test_parallel_build_matches_serial(self):
+        for i in range(10):
+            write(os.path.join(self.content, f"p{i}", "index.md"), f"# P{i}\n\n*{i}*")
+        self.build(False)
+        pages = [path for path, _ in main.collect_static(self.out, self.out)]
+        serial = {path: read(path) for path in pages if path.endswith(".html")}
+        self.assertEqual(len(serial), 12)
+        self.build(False, workers=4)
+        for path, text in serial.items():
+            self.assertEqual(read(path), text)
+        for workers in (1, 4):
+            self.build(False, workers=workers, writer_threads=3)
+            for path, text in serial.items():
+                self.assertEqual(read(path), text)
+
+    def test_failed_build_keeps_the_published_site(self):
+        self.build(False)
+        write(os.path.join(self.content, "bad.md"), "no title here")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        with self.assertRaises(Exception):
+            self.build(False)
+        self.assertEqual(
+            read(os.path.join(self.out, "index.html")),
+            "<title>Home</title><div><h1>Home</h1><p>Hello</p></div>",
+        )
+        releases = os.listdir(publish.releases_dir(self.out))
+        self.assertEqual(len(releases), 1)
+
+    def test_no_staging_build(self):
+        self.build(False)
+        main.build(
+            self.content,
+            self.template,
+            self.static,
+            self.out,
+            True,
+            self.manifest,
+            staging=False,
+        )
+        self.assertFalse(os.path.islink(self.out))
+        self.assertTrue(os.path.isfile(os.path.join(self.out, "index.html")))
+        # The old releases are removed by a background process.
+        releases = publish.releases_dir(self.out)
+        for _ in range(500):
+            if not os.path.exists(releases):
+                break
+            time.sleep(0.01)
+        self.assertFalse(os.path.exists(releases))
+
+    def test_parallel_build_reports_failing_file(self):
+        bad = os.path.join(self.content, "bad.md")
+        write(bad, "no title here")
+        for writer_threads in (0, 2):
+            with self.assertRaises(Exception) as ctx:
+                self.build(False, workers=2, writer_threads=writer_threads)
+            self.assertIn(bad, str(ctx.exception))
+
+    def test_template_only_rebuild_reuses_cached_bodies(self):
+        render_cache = RenderCache(os.path.join(self.root, "cache"), 1 << 20, 1)
+        main.build(
+            self.content,
+            self.template,
+            self.static,
+            self.out,
+            False,
+            self.manifest,
+            render_cache=render_cache,
+        )
+        self.assertEqual((render_cache.hits, render_cache.misses), (0, 2))
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        main.build(
+            self.content,
+            self.template,
+            self.static,
+            self.out,
+            True,
+            self.manifest,
+            render_cache=render_cache,
+        )
+        self.assertEqual((render_cache.hits, render_cache.misses), (2, 2))
+        self.assertEqual(
+            read(os.path.join(self.out, "index.html")),
+            "<h1>Home</h1><div><h1>Home</h1><p>Hello</p></div>",
+        )
+
+    def test_cached_bodies_are_not_parsed_again(self):
+        write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/post)")
+        render_cache = RenderCache(os.path.join(self.root, "cache"), 1 << 20, 1)
+        parses = []
+        markdown_to_html_node = textnode.markdown_to_html_node
+
+        def counting(markdown):
+            parses.append(markdown)
+            return markdown_to_html_node(markdown)
+
+        textnode.markdown_to_html_node = counting
+        try:
+            for _ in range(2):
+                main.build(
+                    self.content,
+                    self.template,
+                    self.static,
+                    self.out,
+                    False,
+                    self.manifest,
+                    render_cache=render_cache,
+                )
+        finally:
+            textnode.markdown_to_html_node = markdown_to_html_node
+        # A full build starts from an empty manifest; the links still come
+        # from the cache entries.
+        self.assertEqual(len(parses), 2)
+        entry = manifest.load_manifest(self.manifest)["pages"][
+            os.path.join(self.content, "index.md")
+        ]
+        self.assertEqual(entry["links"], ["/post"])
+
+    def test_links_are_recorded_and_checked(self):
+        write(
+            os.path.join(self.content, "index.md"),
+            "# Home\n\n[post](/post) [gone](/gone) ![css](/index.css)",
+        )
+        render_cache = RenderCache(os.path.join(self.root, "cache"), 1 << 20, 1)
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            main.build(
+                self.content,
+                self.template,
+                self.static,
+                self.out,
+                False,
+                self.manifest,
+                render_cache=render_cache,
+            )
+        self.assertIn(
+            f"Broken link in {os.path.join(self.content, 'index.md')}: /gone",
+            out.getvalue(),
+        )
+        self.assertNotIn("/post\n", out.getvalue())
+
+        # A template change re-renders from the cache and keeps the graph.
+        write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.build(
+                self.content,
+                self.template,
+                self.static,
+                self.out,
+                True,
+                self.manifest,
+                render_cache=render_cache,
+            )
+        self.assertEqual(render_cache.hits, 2)
+        entry = manifest.load_manifest(self.manifest)["pages"][
+            os.path.join(self.content, "index.md")
+        ]
+        self.assertEqual(entry["links"], ["/post", "/gone"])
+        self.assertEqual(entry["images"], ["/index.css"])
+        self.assertEqual(entry["template"], self.template)
+
+    def test_large_pages_are_streamed(self):
+        write(
+            os.path.join(self.content, "post", "index.md"),
+            "# Post\n\n> quote [home](/)\n\n- a\n- b\n\n```\ncode\n```",
+        )
+        self.build(False)
+        expected = read(os.path.join(self.out, "post", "index.html"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.build(
+                self.content,
+                self.template,
+                self.static,
+                self.out,
+                False,
+                self.manifest,
+                stream_threshold=0,
+            )
+        self.assertEqual(read(os.path.join(self.out, "post", "index.html")), expected)
+        entry = manifest.load_manifest(self.manifest)["pages"][
+            os.path.join(self.content, "post", "index.md")
+        ]
+        self.assertEqual(entry["links"], ["/"])
+
+    def test_profiled_build(self):
+        prof = Profiler()
+        text_to_textnodes = textnode.text_to_textnodes
+        main.build(
+            self.content,
+            self.template,
+            self.static,
+            self.out,
+            False,
+            self.manifest,
+            prof=prof,
+        )
+        self.assertIs(textnode.text_to_textnodes, text_to_textnodes)
+        self.assertEqual(len(prof.pages), 2)
+        for stage in ("read", "extract_title", "inline_parse", "to_html", "write"):
+            self.assertIn(stage, prof.stages)
+        self.assertEqual(
+            read(os.path.join(self.out, "index.html")),
+            "<title>Home</title><div><h1>Home</h1><p>Hello</p></div>",
+        )
+
+
+class TestRemoveOrphans(unittest.TestCase):
+    def test_pruning_stays_inside_root(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = os.path.join(tmp, "public")
+            sibling = os.path.join(tmp, "public2", "empty")
+            os.makedirs(sibling)
+            write(os.path.join(root, "a", "page.html"), "orphan")
+            old = {"a.md": {"out": os.path.join("a", "page.html")}}
+            removed = manifest.remove_orphans(old, {}, root)
+            self.assertEqual(removed, [os.path.join(root, "a", "page.html")])
+            self.assertFalse(os.path.exists(os.path.join(root, "a")))
+            self.assertTrue(os.path.isdir(root))
+            # public2 shares a string prefix with public but is not inside it.
+            manifest.__prune_empty_dirs__(os.path.join(sibling, "x.html"), root)
+            self.assertTrue(os.path.isdir(sibling))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def test_nested_stages_are_exclusive(self):
+        prof = Profiler()
+        with prof.page("a.md"):
+            with prof.stage("outer"):
+                with prof.stage("inner"):
+                    time.sleep(0.02)
+        report = prof.report()
+        self.assertEqual(report["pages"], 1)
+        self.assertEqual(report["stages"]["outer"]["count"], 1)
+        self.assertGreaterEqual(report["stages"]["inner"]["time"], 0.02)
+        self.assertLess(report["stages"]["outer"]["time"], 0.02)
+        self.assertEqual(set(prof.pages[0]["stages"]), {"outer", "inner"})
+
+    def test_wrap_counts_calls(self):
+        prof = Profiler()
+        double = prof.wrap("double", lambda x: x * 2)
+        self.assertEqual([double(1), double(2)], [2, 4])
+        self.assertEqual(prof.report()["stages"]["double"]["count"], 2)
+
+    def test_slowest_pages_and_json(self):
+        prof = Profiler()
+        for name, delay in (("fast.md", 0.0), ("slow.md", 0.02)):
+            with prof.page(name):
+                time.sleep(delay)
+        self.assertEqual(prof.slowest_pages(1)[0]["path"], "slow.md")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "profile.json")
+            prof.write_json(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["pages"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+import unittest
+
+import publish
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+class TestPublish(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.out = os.path.join(self.tmp.name, "public")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_publish_flips_symlink(self):
+        first = publish.new_release(self.out)
+        write(os.path.join(first, "index.html"), "one")
+        self.assertEqual(publish.publish(self.out, first), [])
+        self.assertTrue(os.path.islink(self.out))
+        self.assertEqual(read(os.path.join(self.out, "index.html")), "one")
+
+        second = publish.new_release(self.out)
+        write(os.path.join(second, "index.html"), "two")
+        self.assertEqual(
+            publish.publish(self.out, second), [first + publish.RETIRED_SUFFIX]
+        )
+        self.assertEqual(read(os.path.join(self.out, "index.html")), "two")
+        self.assertEqual(publish.current_release(self.out), os.path.realpath(second))
+
+    def test_publish_replaces_a_plain_directory(self):
+        write(os.path.join(self.out, "index.html"), "legacy")
+        release = publish.new_release(self.out)
+        write(os.path.join(release, "index.html"), "new")
+        garbage = publish.publish(self.out, release)
+        self.assertEqual(len(garbage), 1)
+        self.assertEqual(read(os.path.join(garbage[0], "index.html")), "legacy")
+        self.assertEqual(read(os.path.join(self.out, "index.html")), "new")
+
+    def test_publish_keeps_concurrent_staging_releases(self):
+        first = publish.new_release(self.out)
+        publish.publish(self.out, first)
+        staging = publish.new_release(self.out)
+        abandoned = publish.new_release(self.out)
+        day_ago = time.time() - publish.ABANDONED_AFTER - 1
+        os.utime(abandoned, (day_ago, day_ago))
+        second = publish.new_release(self.out)
+        garbage = publish.publish(self.out, second)
+        self.assertEqual(
+            sorted(garbage), sorted([first + publish.RETIRED_SUFFIX, abandoned])
+        )
+        self.assertTrue(os.path.isdir(staging))
+
+    def test_remove_in_background_removes_empty_releases_dir(self):
+        release = publish.new_release(self.out)
+        publish.retire(self.out, release)
+        publish.remove_in_background(publish.garbage(self.out))
+        releases = publish.releases_dir(self.out)
+        for _ in range(500):
+            if not os.path.exists(releases):
+                break
+            time.sleep(0.01)
+        self.assertFalse(os.path.exists(releases))
+
+    def test_clone_tree_hardlinks_files(self):
+        src = publish.new_release(self.out)
+        write(os.path.join(src, "a", "b", "index.html"), "page")
+        dst = publish.new_release(self.out)
+        publish.clone_tree(src, dst)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(src, "a", "b", "index.html"),
+                os.path.join(dst, "a", "b", "index.html"),
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
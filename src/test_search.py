@@ -0,0 +1,224 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import main
+import search
+import textnode
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def read_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def record_of(markdown):
+    builder = search.RecordBuilder(main.extract_title(markdown))
+    builder.add(textnode.markdown_to_html_node(markdown))
+    return builder.record()
+
+
+def records_of(pages):
+    records = search.new_records()
+    for src, (url, markdown) in pages.items():
+        record = record_of(markdown)
+        record["hash"], record["url"] = src, url
+        records["pages"][src] = record
+    return records
+
+
+class TestRecords(unittest.TestCase):
+    def test_record_weights_title_and_headings(self):
+        record = record_of(
+            "# Hobbits\n\n## Second Breakfast\n\nHobbits eat a second breakfast. "
+            "![a pipe](/pipe.png) [The Shire](/shire)"
+        )
+        self.assertEqual(record["title"], "Hobbits")
+        self.assertEqual(record["headings"], ["Hobbits", "Second Breakfast"])
+        terms = record["terms"]
+        weight = search.TITLE_WEIGHT + search.HEADING_WEIGHT + 1
+        self.assertEqual(terms["hobbits"], weight)
+        self.assertEqual(terms["breakfast"], search.HEADING_WEIGHT + 1)
+        self.assertEqual(terms["pipe"], 1)
+        self.assertEqual(terms["shire"], 1)
+        self.assertNotIn("a", terms)
+
+    def test_streamed_record_matches_whole_page(self):
+        markdown = "# Title\n\n## Part\n\nSome `code` and *words*\n\n- one\n- two"
+        builder = search.RecordBuilder("Title")
+        for node in textnode.iter_block_nodes(io.StringIO(markdown)):
+            builder.add(node)
+        self.assertEqual(builder.record(), record_of(markdown))
+
+    def test_shard_of_is_fnv1a(self):
+        self.assertEqual(search.shard_of("", 1 << 32), 0x811C9DC5)
+        self.assertEqual(search.shard_of("a", 1 << 32), 0xE40C292C)
+        self.assertEqual(search.shard_of("hobbit"), search.shard_of("hobbit"))
+
+    def test_page_url(self):
+        self.assertEqual(search.page_url("index.html"), "/")
+        self.assertEqual(search.page_url(os.path.join("post", "index.html")), "/post/")
+        self.assertEqual(search.page_url("about.html"), "/about.html")
+
+
+class TestIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.pages = {
+            "a.md": ("/a.html", "# Alpha\n\nShared words"),
+            "b.md": ("/b.html", "# Beta\n\nShared things"),
+            "c.md": ("/c.html", "# Gamma\n\nOther"),
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_ids_are_stable(self):
+        old = records_of(self.pages)
+        search.assign_ids(search.new_records(), old)
+        ids = [old["pages"][src]["id"] for src in sorted(old["pages"])]
+        self.assertEqual(ids, [0, 1, 2])
+        del self.pages["a.md"]
+        self.pages["d.md"] = ("/d.html", "# Delta")
+        new = records_of(self.pages)
+        search.assign_ids(old, new)
+        ids = {src: record["id"] for src, record in new["pages"].items()}
+        self.assertEqual(ids, {"b.md": 1, "c.md": 2, "d.md": 0})
+
+    def test_index_layout(self):
+        records = records_of(self.pages)
+        search.write_index(records, search.new_records(), self.root, "search", 4)
+        index = read_json(os.path.join(self.root, "search", "index.json"))
+        self.assertEqual(index["shards"], 4)
+        self.assertEqual(index["pages"][1], ["/b.html", "Beta", ["Beta"]])
+        name = f"terms-{search.shard_of('shared', 4):02x}.json"
+        postings = read_json(os.path.join(self.root, "search", name))
+        self.assertEqual(postings["shared"], [[0, 1], [1, 1]])
+
+    def test_unchanged_files_are_not_rewritten(self):
+        old = records_of(self.pages)
+        written = search.write_index(old, search.new_records(), self.root, "search")
+        self.assertEqual(len(written), search.SHARDS + 1)
+        new = records_of(self.pages)
+        self.assertEqual(search.write_index(new, old, self.root, "search"), [])
+
+        self.pages["c.md"] = ("/c.html", "# Gamma\n\nChanged")
+        newer = records_of(self.pages)
+        written = search.write_index(newer, new, self.root, "search")
+        names = {os.path.basename(path) for path in written}
+        expected = {
+            f"terms-{search.shard_of(term):02x}.json" for term in ("other", "changed")
+        }
+        self.assertEqual(names, expected)
+
+    def test_moving_the_index_removes_the_old_one(self):
+        old = records_of(self.pages)
+        search.write_index(old, search.new_records(), self.root, "search")
+        new = records_of(self.pages)
+        search.write_index(new, old, self.root, "find")
+        self.assertFalse(os.path.exists(os.path.join(self.root, "search")))
+        self.assertTrue(os.path.isfile(os.path.join(self.root, "find", "index.json")))
+
+
+class TestSearchBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.out = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        self.manifest = os.path.join(self.root, ".ssg", "manifest.json")
+        self.records = os.path.join(self.root, ".ssg", "search.json")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome hobbits")
+        post = "# Post\n\n## Ring\n\nOne"
+        write(os.path.join(self.content, "post", "index.md"), post)
+        os.makedirs(self.static)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, search_dir="search", **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return main.build(
+                self.content,
+                self.template,
+                self.static,
+                self.out,
+                True,
+                self.manifest,
+                search_dir=search_dir,
+                search_path=self.records,
+                **kwargs,
+            )
+
+    def index(self):
+        return read_json(os.path.join(self.out, "search", "index.json"))["pages"]
+
+    def test_index_is_built_and_updated_incrementally(self):
+        self.build()
+        self.assertEqual(
+            self.index(),
+            [["/", "Home", ["Home"]], ["/post/", "Post", ["Post", "Ring"]]],
+        )
+        self.assertEqual(self.build()["rendered"], 0)
+        write(os.path.join(self.content, "post", "index.md"), "# Story\n\nTwo")
+        self.assertEqual(self.build()["rendered"], 1)
+        self.assertEqual(self.index()[1], ["/post/", "Story", ["Story"]])
+
+    def test_index_from_every_render_path(self):
+        self.build(writer_threads=0)
+        expected = self.index()
+        for kwargs in (
+            {"writer_threads": 2, "workers": 2},
+            {"stream_threshold": 1},
+            {"prof": main.profiler.Profiler()},
+        ):
+            os.remove(self.records)
+            self.build(**kwargs)
+            self.assertEqual(self.index(), expected)
+
+    def test_cached_bodies_still_get_records(self):
+        render_cache = main.cache.RenderCache(
+            os.path.join(self.root, "cache"), 1 << 20, textnode.PARSER_VERSION
+        )
+        parses = []
+        markdown_to_html_node = textnode.markdown_to_html_node
+
+        def counting(markdown):
+            parses.append(markdown)
+            return markdown_to_html_node(markdown)
+
+        # Pages are parsed by the workers; the build process never parses a
+        # cached page again, not even to add the search record.
+        textnode.markdown_to_html_node = counting
+        try:
+            self.build(search_dir=None, render_cache=render_cache, workers=2)
+            self.build(render_cache=render_cache, workers=2)
+            os.remove(self.records)
+            self.build(render_cache=render_cache, workers=2)
+        finally:
+            textnode.markdown_to_html_node = markdown_to_html_node
+        self.assertEqual(parses, [])
+        self.assertEqual(len(self.index()), 2)
+
+    def test_disabling_search_removes_the_index(self):
+        self.build()
+        self.build(search_dir=None)
+        self.assertFalse(os.path.exists(os.path.join(self.out, "search")))
+        self.assertFalse(os.path.exists(self.records))
+
+
+if __name__ == "__main__":
+    unittest.main()
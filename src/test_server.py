@@ -0,0 +1,122 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+import cache
+import main
+import server
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join(self.content, "index.md"), "# Home\n\n[post](/post)")
+        write(os.path.join(self.root, "secret.md"), "# Secret")
+        write(os.path.join(self.root, "static", "index.css"), "body {}")
+        self.renderer = server.Renderer(
+            self.content,
+            self.template,
+            os.path.join(self.root, "static"),
+            os.path.join(self.root, "public"),
+            cache.MemoryCache(16, 1),
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def start(self, **kwargs):
+        httpd = server.make_server(self.renderer, **kwargs)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        return httpd
+
+    def request(self, httpd, path, data=None):
+        url = f"http://127.0.0.1:{httpd.server_address[1]}{path}"
+        with urllib.request.urlopen(url, data) as response:
+            return response.read().decode()
+
+    def test_render_file_uses_warm_cache(self):
+        httpd = self.start(port=0)
+        expected, _ = main.render_page(
+            os.path.join(self.content, "index.md"), self.template
+        )
+        self.assertEqual(self.request(httpd, "/render?path=index.md"), expected)
+        self.assertEqual(self.request(httpd, "/render?path=index.md"), expected)
+        stats = json.loads(self.request(httpd, "/stats"))
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_render_posted_markdown(self):
+        httpd = self.start(port=0)
+        self.assertEqual(
+            self.request(httpd, "/render", b"# Draft\n\nText"),
+            "<title>Draft</title><div><h1>Draft</h1><p>Text</p></div>",
+        )
+
+    def test_errors_are_reported(self):
+        httpd = self.start(port=0)
+        for path, data in (
+            ("/render?path=../secret.md", None),
+            ("/render", b"no title"),
+            ("/nope", None),
+        ):
+            with self.assertRaises(urllib.error.HTTPError) as e:
+                self.request(httpd, path, data)
+            self.assertIn(e.exception.code, (400, 404))
+
+    def test_build(self):
+        httpd = self.start(port=0)
+        manifest_path = main.MANIFEST_PATH
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+        with contextlib.redirect_stdout(io.StringIO()):
+            body = self.request(httpd, "/build", b'{"incremental": false}')
+            again = self.request(httpd, "/build", b"{}")
+        result = json.loads(body)
+        self.assertEqual((result["rendered"], result["copied"]), (1, 1))
+        self.assertEqual(
+            result["broken_links"], [[os.path.join(self.content, "index.md"), "/post"]]
+        )
+        self.assertEqual(json.loads(again)["rendered"], 0)
+        self.assertTrue(os.path.isfile(os.path.join(self.root, "public", "index.html")))
+        self.assertTrue(os.path.isfile(os.path.join(self.root, manifest_path)))
+
+    def test_unix_socket(self):
+        path = os.path.join(self.root, "render.sock")
+        self.start(socket_path=path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(path)
+            client.sendall(b"GET /render?path=index.md HTTP/1.0\r\n\r\n")
+            response = b""
+            while chunk := client.recv(4096):
+                response += chunk
+        self.assertTrue(response.startswith(b"HTTP/1.0 200"))
+        self.assertTrue(
+            response.endswith(
+                b'<title>Home</title><div><h1>Home</h1><p><a href="/post">post</a></p>'
+                b"</div>"
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
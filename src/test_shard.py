@@ -0,0 +1,115 @@
+import gzip
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import shard
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+class TestShard(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        write(os.path.join(self.root, "template.html"), "{{ Title }}|{{ Content }}")
+        write(os.path.join(self.root, "static", "a.css"), "a {}")
+        write(os.path.join(self.root, "static", "b.css"), "b {}")
+        for i in range(7):
+            body = f"# Page {i}\n\n[next](/p{i + 1})\n\n" + "text " * (i * 50)
+            write(os.path.join(self.root, "content", f"p{i}.md"), body)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_main(self, *args):
+        return subprocess.run(
+            [sys.executable, MAIN, "--no-cache", *args],
+            cwd=self.root,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    def jobs(self):
+        content = os.path.join(self.root, "content")
+        return [
+            (os.path.join(content, name), name.replace(".md", ".html"))
+            for name in sorted(os.listdir(content))
+        ]
+
+    def test_parse_shard(self):
+        self.assertEqual(shard.parse_shard("2/3"), (2, 3))
+        for value in ("0/3", "4/3", "1/0", "3", "a/b"):
+            with self.assertRaises(ValueError):
+                shard.parse_shard(value)
+
+    def test_partition_is_balanced_and_complete(self):
+        jobs = self.jobs()
+        shards = shard.partition(jobs, 3)
+        self.assertEqual(sorted(job for part in shards for job in part), jobs)
+        sizes = [sum(os.path.getsize(frm) for frm, _ in part) for part in shards]
+        largest = max(os.path.getsize(frm) for frm, _ in jobs)
+        self.assertLessEqual(max(sizes) - min(sizes), largest)
+        self.assertEqual(shard.partition(list(reversed(jobs)), 3), shards)
+
+    def test_shards_merge_into_one_site(self):
+        self.run_main()
+        expected = {}
+        for name in os.listdir(os.path.join(self.root, "public")):
+            expected[name] = read(os.path.join(self.root, "public", name))
+
+        procs = [
+            subprocess.Popen(
+                [sys.executable, MAIN, "--no-cache", "--shard", f"{i}/3"],
+                cwd=self.root,
+                stdout=subprocess.DEVNULL,
+            )
+            for i in (1, 2, 3)
+        ]
+        for proc in procs:
+            self.assertEqual(proc.wait(), 0)
+        out = self.run_main("--merge", "3")
+
+        merged = {}
+        for name in os.listdir(os.path.join(self.root, "public")):
+            merged[name] = read(os.path.join(self.root, "public", name))
+        self.assertEqual(merged, expected)
+        self.assertIn("Broken link in ./content/p6.md: /p7", out)
+        self.assertIn("Merged 3 shard(s): 7 page(s), 2 asset(s).", out)
+
+    def test_merged_search_index_matches_unsharded(self):
+        index = os.path.join(self.root, "public", "search", "index.json")
+        self.run_main("--search-index")
+        expected = read(index)
+        for i in (1, 2):
+            self.run_main("--search-index", "--shard", f"{i}/2")
+        shard_root = os.path.join(self.root, "public.shards", "1-of-2")
+        self.assertFalse(os.path.exists(os.path.join(shard_root, "search")))
+        self.run_main("--search-index", "--merge", "2", "--compress", "gzip")
+        self.assertEqual(read(index), expected)
+        with gzip.open(index + ".gz", "rt") as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_merge_requires_every_shard(self):
+        self.run_main("--shard", "1/2")
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.run_main("--merge", "2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import io
+import os
+import tempfile
+import unittest
+
+import template
+from htmlnode import LeafNode
+from htmlnode import ParentNode
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        t = Template("<title> {{ Title }} </title>{{Content}}<p>{{ Title }}</p>")
+        self.assertEqual(t.names, ["Title", "Content", "Title"])
+        self.assertEqual(
+            t.render(Title="Home", Content="<b>x</b>"),
+            "<title> Home </title><b>x</b><p>Home</p>",
+        )
+
+    def test_unknown_placeholder_is_left_alone(self):
+        t = Template("{{ Title }} by {{ Author }}")
+        self.assertEqual(t.render(Title="Home"), "Home by {{ Author }}")
+
+    def test_write_streams_nodes(self):
+        t = Template("<article>{{ Content }}</article>")
+        node = ParentNode("div", [LeafNode("p", "hi")])
+        out = io.StringIO()
+        t.write(out, Content=node)
+        self.assertEqual(out.getvalue(), "<article><div><p>hi</p></div></article>")
+
+    def test_load_template_is_cached_until_modified(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as f:
+                f.write("{{ Title }}")
+            first = template.load_template(path)
+            self.assertIs(template.load_template(path), first)
+
+            with open(path, "w") as f:
+                f.write("<h1>{{ Title }}</h1>")
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            second = template.load_template(path)
+            self.assertIsNot(second, first)
+            self.assertEqual(second.render(Title="x"), "<h1>x</h1>")
+
+
+if __name__ == "__main__":
+    unittest.main()
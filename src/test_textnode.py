@@ -1,3 +1,5 @@
+import io
+import random
 import unittest
 
 from textnode import TextNode
@@ -32,6 +34,15 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", "bold", "https://yahoo.com")
         self.assertNotEqual(node, node2)
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_heading_tags(self):
+        for level in range(1, 7):
+            node = textnode.markdown_to_html_node("#" * level + " title")
+            self.assertEqual(node.children[0].tag, f"h{level}")
+
     def test_to_html(self):
 
         text_node = TextNode("Normal Text", TextType.TEXT)
@@ -84,6 +95,14 @@ class TestTextNode(unittest.TestCase):
         self.assertEqual(new_nodes[2].text, " word")
         self.assertEqual(new_nodes[2].text_type, TextType.TEXT)
 
+    def test_extract_markdown_images_and_links(self):
+        text = "![alt](/a.png) and [link](/b) and [other](https://c.d)"
+        self.assertEqual(textnode.extract_markdown_images(text), [("alt", "/a.png")])
+        self.assertEqual(
+            textnode.extract_markdown_links(text),
+            [("alt", "/a.png"), ("link", "/b"), ("other", "https://c.d")],
+        )
+
     def test_markdown_to_blocks(self):
         markdown = """
 # This is a heading
@@ -102,6 +121,52 @@ This is the same paragraph on a new line
         )
         self.assertEqual(blocks[2], "* This is a list\n* with items")
 
+    def test_parse_blocks(self):
+        markdown = "# Title\n\n  para one\npara two  \n<br>\n- a\n- b\n\n1. x\n2. y"
+        blocks = textnode.parse_blocks(markdown)
+        self.assertEqual(
+            [(b.start, b.end, b.block_type) for b in blocks],
+            [
+                (0, 1, textnode.BlockType.HEADING),
+                (2, 4, textnode.BlockType.PARAGRAPH),
+                (4, 5, textnode.BlockType.PARAGRAPH),
+                (5, 7, textnode.BlockType.ULIST),
+                (8, 10, textnode.BlockType.OLIST),
+            ],
+        )
+        self.assertEqual(blocks[1].text(), "para one\npara two")
+        self.assertEqual(blocks[3].block_lines(), ["- a", "- b"])
+
+    def test_iter_blocks_matches_parse_blocks(self):
+        markdown = "# Title\n\n  para one\npara two  \n<br>\n- a\n- b\n\n\n1. x\n2. y\n"
+        streamed = list(textnode.iter_blocks(io.StringIO(markdown)))
+        parsed = textnode.parse_blocks(markdown)
+        self.assertEqual(
+            [(b.text(), b.block_type) for b in streamed],
+            [(b.text(), b.block_type) for b in parsed],
+        )
+        nodes = textnode.iter_block_nodes(markdown.split("\n"))
+        html = "".join([node.to_html() for node in nodes])
+        self.assertEqual(
+            f"<div>{html}</div>", textnode.markdown_to_html_node(markdown).to_html()
+        )
+
+    def test_ordered_list_must_count_up(self):
+        self.assertEqual(
+            textnode.block_to_block_type("1. a\n3. b"), textnode.BlockType.PARAGRAPH
+        )
+        self.assertEqual(
+            textnode.block_to_block_type("1. a\n2. b\n3. c"), textnode.BlockType.OLIST
+        )
+
+    def test_bare_hash_line_is_a_heading(self):
+        self.assertEqual(
+            textnode.block_to_block_type("#\ntext"), textnode.BlockType.HEADING
+        )
+        self.assertEqual(
+            textnode.block_to_block_type("#######\ntext"), textnode.BlockType.PARAGRAPH
+        )
+
     def test_block_to_block_type(self):
         blocks = [
             "This is a paragraph.\nIt is on two lines.",
@@ -131,5 +196,144 @@ This is the same paragraph on a new line
         )
 
 
+class TestBlockquote(unittest.TestCase):
+    def assertQuoteDepth(self, node, depth, text):
+        # Walk the tree without recursion: blockquote > div > blockquote > ...
+        node = node.children[0]
+        for _ in range(depth):
+            self.assertEqual(node.tag, "blockquote")
+            div = node.children[0]
+            self.assertEqual(div.tag, "div")
+            node = div.children[0]
+        self.assertEqual(node.tag, "p")
+        self.assertEqual(node.children[0].value, text)
+
+    def test_nested_quote(self):
+        markdown = "> # Title\n>\n> > - a\n> > - b\n>\n> *end*"
+        expected = (
+            "<div><blockquote><div><h1>Title</h1>"
+            "<blockquote><div><ul><li>a</li><li>b</li></ul></div></blockquote>"
+            "<p><em>end</em></p></div></blockquote></div>"
+        )
+        self.assertEqual(textnode.markdown_to_html_node(markdown).to_html(), expected)
+
+    def test_deeply_nested_quotes(self):
+        for depth in (1000, 5000):
+            markdown = "> " * depth + "deep"
+            node = textnode.markdown_to_html_node(markdown)
+            self.assertQuoteDepth(node, depth, "deep")
+            self.assertEqual(
+                node.to_html(),
+                "<div>"
+                + "<blockquote><div>" * depth
+                + "<p>deep</p>"
+                + "</div></blockquote>" * depth
+                + "</div>",
+            )
+
+    def test_deeply_nested_quote_with_lines_at_every_level(self):
+        depth = 500
+        lines = []
+        for level in range(1, depth + 1):
+            lines.append("> " * level + f"line {level}")
+            lines.append("> " * level)
+        node = textnode.markdown_to_html_node("\n".join(lines))
+        quote = node.children[0]
+        for level in range(1, depth + 1):
+            div = quote.children[0]
+            self.assertEqual(div.children[0].children[0].value, f"line {level}")
+            if level < depth:
+                quote = div.children[1]
+
+    def test_matches_markdown_reparse(self):
+        markdown = ">> not nested\n>ab\n> <br>\n> > nested"
+        node = textnode.markdown_to_html_node(markdown)
+        self.assertEqual(
+            node.to_html(),
+            "<div><blockquote><div><p>not nested\nb</p><p><br></p>"
+            "<blockquote><div><p>nested</p></div></blockquote></div></blockquote></div>",
+        )
+
+
+class TestInlineScanner(unittest.TestCase):
+    def assertMatchesMultipass(self, text):
+        self.assertEqual(
+            textnode.text_to_textnodes(text),
+            textnode.text_to_textnodes_multipass(text),
+            repr(text),
+        )
+
+    def test_text_to_textnodes(self):
+        text = "This is **text** with an *italic* word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        expected = [
+            TextNode("This is ", TextType.TEXT),
+            TextNode("text", TextType.BOLD),
+            TextNode(" with an ", TextType.TEXT),
+            TextNode("italic", TextType.ITALIC),
+            TextNode(" word and a ", TextType.TEXT),
+            TextNode("code block", TextType.CODE),
+            TextNode(" and an ", TextType.TEXT),
+            TextNode(
+                "obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"
+            ),
+            TextNode(" and a ", TextType.TEXT),
+            TextNode("link", TextType.LINK, "https://boot.dev"),
+        ]
+        self.assertEqual(textnode.text_to_textnodes(text), expected)
+
+    def test_matches_multipass_on_edge_cases(self):
+        cases = [
+            "",
+            "plain",
+            "***bold italic*** and **bold** and *italic*",
+            "**unclosed bold",
+            "a******b",
+            "**a***b***",
+            "`a*b*c`",
+            "*`code` inside italic*",
+            "![img](a.png)[link](b)![img2](c.png)",
+            "[a](b)[a](b)[a](b)",
+            "![a] b](c)",
+            "[*link*](/x*y*)",
+        ]
+        for text in cases:
+            self.assertMatchesMultipass(text)
+
+    def test_matches_multipass_on_random_input(self):
+        rng = random.Random(0)
+        alphabet = ["*", "**", "***", "`", "[", "]", "(", ")", "!", "a", " ", "[l](u)"]
+        for _ in range(5000):
+            length = rng.randint(0, 12)
+            self.assertMatchesMultipass("".join(rng.choices(alphabet, k=length)))
+
+
+class TestInlineMemo(unittest.TestCase):
+    def tearDown(self):
+        textnode.set_inline_memo(None)
+
+    def test_memo_is_off_by_default(self):
+        self.assertIsNone(textnode.inline_memo_info())
+
+    def test_memoized_output_matches(self):
+        markdown = (
+            "# [Home](/) *nav*\n\n[Home](/) *nav*\n\n- [Home](/) *nav*\n"
+            "- [Home](/) *nav*\n\n> [Home](/) *nav*"
+        )
+        expected = textnode.markdown_to_html_node(markdown).to_html()
+        textnode.set_inline_memo(16)
+        self.assertEqual(textnode.markdown_to_html_node(markdown).to_html(), expected)
+        self.assertEqual(textnode.markdown_to_html_node(markdown).to_html(), expected)
+        memo = textnode.inline_memo_info()
+        self.assertEqual((memo.hits, memo.misses, memo.currsize), (9, 1, 1))
+
+    def test_memo_is_bounded(self):
+        textnode.set_inline_memo(2)
+        for i in range(10):
+            textnode.markdown_to_html_node(f"paragraph {i}")
+        self.assertEqual(textnode.inline_memo_info().currsize, 2)
+        textnode.set_inline_memo(0)
+        self.assertIsNone(textnode.inline_memo_info())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import main
+import watch
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def read(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.out = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        write(self.template, "{{ Title }}|{{ Content }}")
+        write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        write(os.path.join(self.content, "post", "index.md"), "# Post\n\nBody")
+        write(os.path.join(self.static, "index.css"), "body {}")
+        main.build(
+            self.content,
+            self.template,
+            self.static,
+            self.out,
+            manifest_path=os.path.join(root, "manifest.json"),
+        )
+        self.watcher = watch.Watcher(
+            self.content, self.template, self.static, self.out, 0.001, 0.001
+        )
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def touch(self, path, text):
+        write(path, text)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_page_destination(self):
+        self.assertEqual(
+            watch.page_destination("content", "public", "content/a.md/b.md"),
+            os.path.join("public", "a.html", "b.html"),
+        )
+
+    def test_rebuilds_only_the_touched_page(self):
+        post = os.path.join(self.out, "post", "index.html")
+        write(post, "untouched")
+        self.touch(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        changed, removed = self.watcher.wait_for_changes()
+        self.assertEqual(self.watcher.rebuild(changed, removed), 1)
+        self.assertEqual(
+            read(os.path.join(self.out, "index.html")),
+            "Home|<div><h1>Home</h1><p>Changed</p></div>",
+        )
+        self.assertEqual(read(post), "untouched")
+
+    def test_template_change_rebuilds_everything(self):
+        self.touch(self.template, "<h1>{{ Title }}</h1>")
+        changed, removed = self.watcher.wait_for_changes()
+        self.assertEqual(self.watcher.rebuild(changed, removed), 2)
+        post = os.path.join(self.out, "post", "index.html")
+        self.assertEqual(read(post), "<h1>Post</h1>")
+
+    def test_removed_sources_are_deleted(self):
+        os.remove(os.path.join(self.static, "index.css"))
+        os.remove(os.path.join(self.content, "post", "index.md"))
+        changed, removed = self.watcher.wait_for_changes()
+        self.assertEqual(self.watcher.rebuild(changed, removed), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.out, "index.css")))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "post", "index.html")))
+
+    def test_removed_non_pages_leave_outputs_alone(self):
+        # content/index.css is not a page, but maps onto the static output.
+        notes = os.path.join(self.content, "index.css")
+        write(notes, "not a page")
+        self.watcher.poll()
+        os.remove(notes)
+        changed, removed = self.watcher.wait_for_changes()
+        self.assertEqual(removed, {notes})
+        self.watcher.rebuild(changed, removed)
+        self.assertEqual(read(os.path.join(self.out, "index.css")), "body {}")
+
+    def test_new_and_removed_directories(self):
+        polling = watch.Watcher(
+            self.content, self.template, self.static, self.out, 0.001, 0.001
+        )
+        polling.close()
+        for watcher in (self.watcher, polling):
+            with self.subTest(notified=watcher.notifier is not None):
+                deep = os.path.join(self.content, "new", "deep")
+                write(os.path.join(deep, "a.md"), "# A")
+                changed, _ = watcher.wait_for_changes()
+                self.assertEqual(changed, {os.path.join(deep, "a.md")})
+                # Files in a directory that appeared after the watcher started
+                # are seen too.
+                write(os.path.join(deep, "b.md"), "# B")
+                changed, _ = watcher.wait_for_changes()
+                self.assertEqual(changed, {os.path.join(deep, "b.md")})
+                shutil.rmtree(os.path.join(self.content, "new"))
+                _, removed = watcher.wait_for_changes()
+                self.assertEqual(
+                    removed, {os.path.join(deep, "a.md"), os.path.join(deep, "b.md")}
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
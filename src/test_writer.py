@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+import writer
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_every_page(self):
+        paths = [os.path.join(self.root, f"d{i % 7}", f"{i}.html") for i in range(200)]
+        with writer.OutputWriter(threads=4, queue_size=8) as output:
+            for i, path in enumerate(paths):
+                output.submit(path, f"<p>{i}</p>")
+        self.assertEqual(output.written, 200)
+        for i, path in enumerate(paths):
+            with open(path) as f:
+                self.assertEqual(f.read(), f"<p>{i}</p>")
+        for directory in os.listdir(self.root):
+            names = os.listdir(os.path.join(self.root, directory))
+            self.assertFalse(any(name.endswith(".tmp") for name in names))
+
+    def test_close_reports_write_errors(self):
+        blocker = os.path.join(self.root, "file")
+        with open(blocker, "w") as f:
+            f.write("not a directory")
+        output = writer.OutputWriter(threads=2)
+        output.submit(os.path.join(blocker, "index.html"), "<p></p>")
+        with self.assertRaises(Exception) as ctx:
+            output.close()
+        self.assertIn("index.html", str(ctx.exception))
+
+    def test_atomic_write_leaves_nothing_on_failure(self):
+        path = os.path.join(self.root, "page.html")
+
+        def fail(f):
+            f.write("<p>half")
+            raise RuntimeError("render failed")
+
+        with self.assertRaises(RuntimeError):
+            writer.atomic_write(path, fail)
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_atomic_write_replaces_existing_file(self):
+        path = os.path.join(self.root, "page.html")
+        writer.atomic_write(path, lambda f: f.write("old"))
+        writer.atomic_write(path, lambda f: f.write("new"))
+        with open(path) as f:
+            self.assertEqual(f.read(), "new")
+        self.assertEqual(os.listdir(self.root), ["page.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,14 @@
-import re
+import functools
+from collections.abc import Iterable, Iterator
 from enum import Enum
 from htmlnode import LeafNode
 from htmlnode import ParentNode
 from htmlnode import HTMLNode
+from patterns import HEADING_RE
+from patterns import IMAGE_RE
+from patterns import INLINE_DELIMITER_RE
+from patterns import LINK_RE
+from patterns import OLIST_ITEM_RE
 
 
 class TextType(Enum):
@@ -15,6 +21,13 @@ class TextType(Enum):
     IMAGE = 7
 
 
+# Bump whenever a change to the parser changes the HTML it produces, so that
+# cached renders from older versions are ignored.
+PARSER_VERSION = 1
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
 class BlockType(Enum):
     PARAGRAPH = 1
     HEADING = 2
@@ -25,6 +38,8 @@ class BlockType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str | None = None):
         self.text = text
         self.text_type = text_type
@@ -160,16 +175,16 @@ def split_node_link(old_nodes):
 
 
 def extract_markdown_images(text: str):
-    matches = re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    matches = IMAGE_RE.findall(text)
     return matches
 
 
 def extract_markdown_links(text: str):
-    matches = re.findall(r"\[(.*?)\]\((.*?)\)", text)
+    matches = LINK_RE.findall(text)
     return matches
 
 
-def text_to_textnodes(text: str) -> list[TextNode]:
+def text_to_textnodes_multipass(text: str) -> list[TextNode]:
     node = TextNode(text, TextType.TEXT)
     new_nodes = split_node_delimiter([node], "***", TextType.BOLD_ITALIC)
     new_nodes = split_node_delimiter(new_nodes, "**", TextType.BOLD)
@@ -180,179 +195,384 @@ def text_to_textnodes(text: str) -> list[TextNode]:
     return new_nodes
 
 
-def markdown_to_blocks(markdown: str) -> list[str]:
-    blocks = []
-    lines = markdown.split("\n")
-    concat = False
-    block_count = 0
+# Delimiters in the order text_to_textnodes_multipass splits on them. A lower
+# level takes precedence: while a span is open, delimiters of a higher level
+# are literal text and delimiters of a lower level end the span.
+INLINE_DELIMITERS = {
+    "***": (0, TextType.BOLD_ITALIC),
+    "**": (1, TextType.BOLD),
+    "*": (2, TextType.ITALIC),
+    "`": (3, TextType.CODE),
+}
+
+
+def __append_links__(nodes: list[TextNode], text: str):
+    if "[" not in text:
+        if text != "":
+            nodes.append(TextNode(text, TextType.TEXT))
+        return
+    pos = 0
+    for m in LINK_RE.finditer(text):
+        if m.start() > pos:
+            nodes.append(TextNode(text[pos : m.start()], TextType.TEXT))
+        nodes.append(TextNode(m.group(1), TextType.LINK, m.group(2)))
+        pos = m.end()
+    if pos < len(text):
+        nodes.append(TextNode(text[pos:], TextType.TEXT))
+
+
+def __append_text__(nodes: list[TextNode], text: str):
+    if "![" not in text:
+        __append_links__(nodes, text)
+        return
+    pos = 0
+    for m in IMAGE_RE.finditer(text):
+        __append_links__(nodes, text[pos : m.start()])
+        nodes.append(TextNode(m.group(1), TextType.IMAGE, m.group(2)))
+        pos = m.end()
+    __append_links__(nodes, text[pos:])
 
-    for i in range(len(lines)):
-        line = str.strip(lines[i])
-        if line == "" or str.isspace(line) or line == "<br>":
-            if concat:
-                block_count += 1
 
-            if line == "<br>":
-                blocks.append("<br>")
-                block_count += 1
-            concat = False
+def text_to_textnodes(text: str) -> list[TextNode]:
+    nodes = []
+    open_level = None
+    open_type = None
+    start = 0
+    for m in INLINE_DELIMITER_RE.finditer(text):
+        level, text_type = INLINE_DELIMITERS[m.group()]
+        if open_level is not None and open_level < level:
             continue
-        if concat:
-            blocks[block_count] = str.join("\n", [blocks[block_count], line])
+
+        segment = text[start : m.start()]
+        if open_level is None:
+            __append_text__(nodes, segment)
+        elif segment != "":
+            nodes.append(TextNode(segment, open_type))
+        start = m.end()
+
+        if open_level == level:
+            open_level = None
         else:
-            blocks.append(line)
-            concat = True
+            open_level = level
+            open_type = text_type
 
-    return blocks
+    segment = text[start:]
+    if open_level is None:
+        __append_text__(nodes, segment)
+    elif segment != "":
+        nodes.append(TextNode(segment, open_type))
+    return nodes
 
 
-def __is_heading__(block: str) -> bool:
-    r = r"^#{1,6}\s"
-    matches = re.findall(r, block)
-    return len(matches) != 0
+class Block:
+    __slots__ = ("lines", "start", "end", "block_type")
 
+    def __init__(self, lines: list[str], start: int, end: int, block_type=None):
+        self.lines = lines
+        self.start = start
+        self.end = end
+        self.block_type: BlockType | None = block_type
 
-def __is_code__(block: str) -> bool:
-    return block.startswith("```") and block.endswith("```")
+    def block_lines(self) -> list[str]:
+        return self.lines[self.start : self.end]
 
+    def text(self) -> str:
+        return "\n".join(self.lines[self.start : self.end])
 
-def __is_quote__(block: str) -> bool:
-    lines = block.split("\n")
+    def __repr__(self):
+        return f"Block({self.start}, {self.end}, {self.block_type})"
+
+
+def __split_blocks__(lines: list[str], classify: bool) -> list[Block]:
+    blocks = []
+    start = -1
+    for i in range(len(lines)):
+        line = lines[i]
+        if line == "" or line == "<br>":
+            if start >= 0:
+                blocks.append(Block(lines, start, i))
+                start = -1
+            if line == "<br>":
+                blocks.append(Block(lines, i, i + 1))
+        elif start < 0:
+            start = i
+    if start >= 0:
+        blocks.append(Block(lines, start, len(lines)))
+
+    if classify:
+        for block in blocks:
+            classify_block(block)
+    return blocks
+
+
+def parse_blocks(markdown: str, classify: bool = True) -> list[Block]:
+    lines = [line.strip() for line in markdown.split("\n")]
+    return __split_blocks__(lines, classify)
+
+
+def iter_blocks(lines: Iterable[str], classify: bool = True) -> Iterator[Block]:
+    # The same split as parse_blocks over any iterable of lines, such as an
+    # open file. Each block holds only its own lines, so memory is bounded by
+    # the largest block rather than the whole document.
+    current = []
     for line in lines:
-        if not line.startswith(">"):
+        line = line.strip()
+        if line == "" or line == "<br>":
+            if len(current) != 0:
+                yield __stream_block__(current, classify)
+                current = []
+            if line == "<br>":
+                yield __stream_block__([line], classify)
+        else:
+            current.append(line)
+    if len(current) != 0:
+        yield __stream_block__(current, classify)
+
+
+def __stream_block__(lines: list[str], classify: bool) -> Block:
+    block = Block(lines, 0, len(lines))
+    if classify:
+        classify_block(block)
+    return block
+
+
+def markdown_to_blocks(markdown: str) -> list[str]:
+    return [block.text() for block in parse_blocks(markdown, classify=False)]
+
+
+def __is_heading__(lines: list[str], start: int, end: int) -> bool:
+    first = lines[start]
+    if HEADING_RE.match(first):
+        return True
+    # A bare "#" line followed by another line: the newline is the whitespace.
+    return end - start > 1 and 0 < len(first) <= 6 and first.count("#") == len(first)
+
+
+def __is_code__(lines: list[str], start: int, end: int) -> bool:
+    return lines[start].startswith("```") and lines[end - 1].endswith("```")
+
+
+def __is_quote__(lines: list[str], start: int, end: int) -> bool:
+    for i in range(start, end):
+        if not lines[i].startswith(">"):
             return False
     return True
 
 
-def __is_unordered_list__(block: str) -> bool:
-    lines = block.split("\n")
-    for line in lines:
-        if not line.startswith("* ") and not line.startswith("- "):
+def __is_unordered_list__(lines: list[str], start: int, end: int) -> bool:
+    for i in range(start, end):
+        if not lines[i].startswith("* ") and not lines[i].startswith("- "):
             return False
     return True
 
 
-def __is_ordered_list__(block: str) -> bool:
-    if not block.startswith("1. "):
+def __is_ordered_list__(lines: list[str], start: int, end: int) -> bool:
+    if not lines[start].startswith("1. "):
         return False
 
-    lines = block.split("\n")
-    r = r"^[0-9]+?\.\s"
-    previous_line = -1
-    for line in lines:
-        matches = re.findall(r, line)
-        if len(matches) == 0:
+    previous = 0
+    for i in range(start, end):
+        match = OLIST_ITEM_RE.match(lines[i])
+        if match is None:
             return False
-        if previous_line < 0:
-            previous_line = int(matches[0].replace(". ", ""))
-            continue
-        else:
-            value = int(matches[0].replace(". ", ""))
-            if value - previous_line != 1:
-                return False
-            previous_line = value
+        value = int(match.group(1))
+        if value - previous != 1:
+            return False
+        previous = value
     return True
 
 
-def block_to_block_type(block: str) -> BlockType:
+# Every non-paragraph block type is recognised by its first character.
+BLOCK_MARKERS = frozenset("#`>*-1")
 
-    if __is_heading__(block):
+
+def __block_type__(lines: list[str], start: int, end: int) -> BlockType:
+
+    if lines[start][:1] not in BLOCK_MARKERS:
+        return BlockType.PARAGRAPH
+
+    if __is_heading__(lines, start, end):
         return BlockType.HEADING
 
-    if __is_code__(block):
+    if __is_code__(lines, start, end):
         return BlockType.CODE
 
-    if __is_quote__(block):
+    if __is_quote__(lines, start, end):
         return BlockType.QUOTE
 
-    if __is_unordered_list__(block):
+    if __is_unordered_list__(lines, start, end):
         return BlockType.ULIST
 
-    if __is_ordered_list__(block):
+    if __is_ordered_list__(lines, start, end):
         return BlockType.OLIST
 
     return BlockType.PARAGRAPH
 
 
-def __block_to_paragraph__(block: str) -> ParentNode:
-    children = []
-    text_nodes = text_to_textnodes(block)
-    html_nodes = list(map(text_node_to_html_node, text_nodes))
-    children.extend(html_nodes)
-    parent_node = ParentNode("p", children)
-    return parent_node
+def classify_block(block: Block) -> BlockType:
+    block.block_type = __block_type__(block.lines, block.start, block.end)
+    return block.block_type
 
 
-def __block_to_heading__(block: str) -> ParentNode:
-    match = re.findall(r"^#{1,6}\s", block)
-    heading = len(str.strip(match[0]))
-    text = block.replace(match[0], "")
-    children = []
-    text_nodes = text_to_textnodes(text)
-    html_nodes = list(map(text_node_to_html_node, text_nodes))
-    children.extend(html_nodes)
-    return ParentNode(f"h{heading}", children)
+def block_to_block_type(block: str) -> BlockType:
+    lines = block.split("\n")
+    return __block_type__(lines, 0, len(lines))
 
 
-def __quote_line_string__(line: str) -> str:
-    if line == ">" or line == "> ":
-        return ""
-    else:
-        return line[2:]
+def __inline_nodes__(text: str) -> tuple[HTMLNode, ...]:
+    return tuple(map(text_node_to_html_node, text_to_textnodes(text)))
+
+
+# Optional LRU memo of inline bodies (paragraphs, list items, headings) keyed
+# on their raw text, for sites that repeat the same fragments on every page.
+# Hits share the cached nodes between trees; nodes are never mutated once
+# built, so only the list holding them is fresh.
+__inline_memo__ = None
 
 
-def __block_to_quote__(block: str) -> ParentNode:
-    children = []
-    new_md = "\n".join(map(__quote_line_string__, block.split("\n")))
-    children.append(markdown_to_html_node(new_md))
-    return ParentNode("blockquote", children)
+def set_inline_memo(max_entries: int | None):
+    # None or 0 turns the memo off. Changing the size starts an empty memo.
+    global __inline_memo__
+    if max_entries is None or max_entries <= 0:
+        __inline_memo__ = None
+    else:
+        __inline_memo__ = functools.lru_cache(maxsize=max_entries)(__inline_nodes__)
+
+
+def inline_memo_info():
+    # functools' CacheInfo(hits, misses, maxsize, currsize), or None when the
+    # memo is off.
+    if __inline_memo__ is None:
+        return None
+    return __inline_memo__.cache_info()
+
+
+def __inline_children__(text: str) -> list[HTMLNode]:
+    if __inline_memo__ is None:
+        return list(map(text_node_to_html_node, text_to_textnodes(text)))
+    return list(__inline_memo__(text))
+
+
+def __block_to_paragraph__(block: Block) -> ParentNode:
+    return ParentNode("p", __inline_children__(block.text()))
+
+
+def __block_to_heading__(block: Block) -> ParentNode:
+    text = block.text()
+    match = HEADING_RE.match(text)
+    heading = len(str.strip(match.group()))
+    text = text.replace(match.group(), "")
+    return ParentNode(HEADING_TAGS[heading - 1], __inline_children__(text))
+
+
+# Quote bodies are tracked as (line index, offset) views into the block's lines,
+# so nested quotes are peeled by moving offsets rather than rebuilding strings.
+def __quote_views__(lines: list[str], views: list[tuple[int, int]]):
+    inner = []
+    for i, offset in views:
+        line = lines[i]
+        offset += 2
+        while offset < len(line) and line[offset].isspace():
+            offset += 1
+        inner.append((i, offset))
+    return inner
+
+
+def __split_views__(lines: list[str], views: list[tuple[int, int]]):
+    groups = []
+    current = None
+    for view in views:
+        i, offset = view
+        line = lines[i]
+        if offset >= len(line) or (
+            len(line) - offset == 4 and line.startswith("<br>", offset)
+        ):
+            if current is not None:
+                groups.append(current)
+                current = None
+            if offset < len(line):
+                groups.append([view])
+        elif current is None:
+            current = [view]
+        else:
+            current.append(view)
+    if current is not None:
+        groups.append(current)
+    return groups
+
+
+def __block_to_quote__(block: Block) -> ParentNode:
+    lines = block.lines
+    views = __quote_views__(lines, [(i, 0) for i in range(block.start, block.end)])
+    # Each frame is [groups of views, next group index, rendered children].
+    stack = [[__split_views__(lines, views), 0, []]]
+    while True:
+        frame = stack[-1]
+        groups, index, children = frame
+        if index == len(groups):
+            stack.pop()
+            node = ParentNode("blockquote", [ParentNode("div", children)])
+            if len(stack) == 0:
+                return node
+            stack[-1][2].append(node)
+            continue
+
+        frame[1] += 1
+        group = groups[index]
+        if all([lines[i].startswith(">", offset) for i, offset in group]):
+            inner = __quote_views__(lines, group)
+            stack.append([__split_views__(lines, inner), 0, []])
+        else:
+            texts = [lines[i][offset:] for i, offset in group]
+            inner_block = Block(texts, 0, len(texts))
+            classify_block(inner_block)
+            children.append(render_block(inner_block))
 
 
-def __block_to_code__(block: str) -> ParentNode:
-    return ParentNode("pre", [LeafNode("code", str.strip(block[3:-3]))])
+def __block_to_code__(block: Block) -> ParentNode:
+    return ParentNode("pre", [LeafNode("code", str.strip(block.text()[3:-3]))])
 
 
-def __block_to_ulist__(block: str) -> ParentNode:
+def __block_to_ulist__(block: Block) -> ParentNode:
     list_nodes = []
-    for line in block.split("\n"):
-        text_nodes = text_to_textnodes(line[2:])
-        list_nodes.append(
-            ParentNode("li", list(map(text_node_to_html_node, text_nodes)))
-        )
+    for line in block.block_lines():
+        list_nodes.append(ParentNode("li", __inline_children__(line[2:])))
     return ParentNode("ul", list_nodes)
 
 
-def __block_to_olist__(block: str) -> ParentNode:
+def __block_to_olist__(block: Block) -> ParentNode:
     list_nodes = []
-    for line in block.split("\n"):
-        match = re.findall(r"^[0-9]+?\.\s", line)
-        text_nodes = text_to_textnodes(line[len(match[0]) :])
-        list_nodes.append(
-            ParentNode("li", list(map(text_node_to_html_node, text_nodes)))
-        )
+    for line in block.block_lines():
+        match = OLIST_ITEM_RE.match(line)
+        list_nodes.append(ParentNode("li", __inline_children__(line[match.end() :])))
     return ParentNode("ol", list_nodes)
 
 
+def render_block(block: Block) -> ParentNode:
+    match block.block_type:
+        case BlockType.PARAGRAPH:
+            return __block_to_paragraph__(block)
+        case BlockType.HEADING:
+            return __block_to_heading__(block)
+        case BlockType.QUOTE:
+            return __block_to_quote__(block)
+        case BlockType.CODE:
+            return __block_to_code__(block)
+        case BlockType.ULIST:
+            return __block_to_ulist__(block)
+        case BlockType.OLIST:
+            return __block_to_olist__(block)
+        case _:
+            raise ValueError(f"Don't know BlockType: {block.block_type}")
+
+
 def markdown_to_html_node(markdown: str) -> ParentNode:
-    children = []
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        match block_type:
-            case BlockType.PARAGRAPH:
-                children.append(__block_to_paragraph__(block))
-            case BlockType.HEADING:
-                children.append(__block_to_heading__(block))
-            case BlockType.QUOTE:
-                children.append(__block_to_quote__(block))
-            case BlockType.CODE:
-                children.append(__block_to_code__(block))
-            case BlockType.ULIST:
-                children.append(__block_to_ulist__(block))
-            case BlockType.OLIST:
-                children.append(__block_to_olist__(block))
-            case _:
-                raise ValueError("Don't know BlockType: {block_type}")
-
-    root_node = ParentNode("div", children)
-    return root_node
+    children = [render_block(block) for block in parse_blocks(markdown)]
+    return ParentNode("div", children)
+
+
+def iter_block_nodes(lines: Iterable[str]) -> Iterator[ParentNode]:
+    # Streaming counterpart of markdown_to_html_node: yields the children of
+    # its <div> one block at a time.
+    for block in iter_blocks(lines):
+        yield render_block(block)
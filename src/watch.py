@@ -0,0 +1,336 @@
+import argparse
+import os
+import time
+
+import assets
+import discover
+import main as site
+import notify
+
+# Without change notification every poll rescans the whole tree; polls are
+# spaced at least this many scan times apart so that a large tree keeps the
+# watcher under a fifth of a core.
+POLL_COST_RATIO = 4
+
+
+def __signature__(stat: os.stat_result) -> tuple[int, int]:
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def __list_dir__(directory: str) -> tuple[dict[str, tuple[int, int]], list[str]]:
+    files, subdirs = {}, []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        subdirs.append(entry.path)
+                    elif entry.is_file():
+                        files[entry.path] = __signature__(entry.stat())
+                except FileNotFoundError:
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return files, subdirs
+
+
+def snapshot(paths: list[str], on_dir=None) -> dict[str, tuple[int, int]]:
+    # on_dir is called with each directory before it is listed, so a watch
+    # placed there cannot miss a file created during the walk.
+    files = {}
+    pending = []
+    for path in paths:
+        if os.path.isfile(path):
+            files[path] = __signature__(os.stat(path))
+        elif os.path.isdir(path):
+            pending.append(path)
+    while len(pending) != 0:
+        directory = pending.pop()
+        if on_dir is not None:
+            on_dir(directory)
+        listed, subdirs = __list_dir__(directory)
+        files.update(listed)
+        pending.extend(subdirs)
+    return files
+
+
+def diff(old: dict, new: dict) -> tuple[set[str], set[str]]:
+    changed = {path for path, sig in new.items() if old.get(path) != sig}
+    removed = {path for path in old if path not in new}
+    return changed, removed
+
+
+def page_destination(content_dir: str, out_dir: str, path: str) -> str:
+    rel = os.path.relpath(path, content_dir)
+    parts = [part.replace(".md", ".html") for part in rel.split(os.sep)]
+    return os.path.join(out_dir, *parts)
+
+
+def __is_under__(path: str, directory: str) -> bool:
+    return os.path.commonpath([path, directory]) == directory
+
+
+class Watcher:
+    def __init__(
+        self,
+        content_dir: str,
+        template_path: str,
+        static_dir: str,
+        out_dir: str,
+        interval: float = 0.02,
+        debounce: float = 0.03,
+        include=discover.DEFAULT_INCLUDE,
+        exclude=(),
+    ):
+        self.content_dir = os.path.normpath(content_dir)
+        self.template_path = os.path.normpath(template_path)
+        self.static_dir = os.path.normpath(static_dir)
+        self.out_dir = out_dir
+        self.interval = interval
+        self.debounce = debounce
+        self.include = include
+        self.exclude = exclude
+        self.paths = [self.content_dir, self.static_dir, self.template_path]
+        self.notifier = None
+        self.dirs = set()
+        start = time.perf_counter()
+        try:
+            self.notifier = notify.Inotify()
+            # The template is watched through its directory; only events for
+            # the template itself are kept.
+            self.notifier.watch(os.path.dirname(self.template_path) or ".")
+            self.state = snapshot(self.paths[:2], self.__watch__)
+            self.state.update(snapshot(self.paths[2:]))
+        except OSError as e:
+            # No inotify here, or the watch limit was reached: poll instead.
+            print(f"Change notification unavailable ({e}), polling instead")
+            self.close()
+            self.state = snapshot(self.paths)
+        self.scan_time = time.perf_counter() - start
+
+    def __watch__(self, directory: str):
+        self.notifier.watch(directory)
+        self.dirs.add(directory)
+
+    def close(self):
+        if self.notifier is not None:
+            self.notifier.close()
+            self.notifier = None
+
+    def poll(self) -> tuple[set[str], set[str]]:
+        start = time.perf_counter()
+        if self.notifier is not None:
+            self.dirs = set()
+            current = snapshot(self.paths[:2], self.__watch__)
+            current.update(snapshot(self.paths[2:]))
+        else:
+            current = snapshot(self.paths)
+        self.scan_time = time.perf_counter() - start
+        changed, removed = diff(self.state, current)
+        self.state = current
+        return changed, removed
+
+    def __rescan__(self, dirty: set[str]) -> tuple[set[str], set[str]]:
+        # Re-lists only the directories events were reported for; a directory
+        # that is new is walked whole, one that is gone drops its subtree.
+        old, new = {}, {}
+        for path in sorted(dirty):
+            if path == self.template_path:
+                old[path] = self.state.get(path)
+                try:
+                    new[path] = __signature__(os.stat(path))
+                except FileNotFoundError:
+                    pass
+                continue
+            prefix = path + os.sep
+            if path in self.dirs and os.path.isdir(path):
+                for file, sig in self.state.items():
+                    if file.startswith(prefix) and os.sep not in file[len(prefix) :]:
+                        old[file] = sig
+                listed, subdirs = __list_dir__(path)
+                new.update(listed)
+                for subdir in subdirs:
+                    if subdir not in self.dirs:
+                        new.update(snapshot([subdir], self.__watch__))
+                continue
+            for file, sig in self.state.items():
+                if file.startswith(prefix):
+                    old[file] = sig
+            self.dirs = {d for d in self.dirs if d != path and not d.startswith(prefix)}
+            if os.path.isdir(path):
+                new.update(snapshot([path], self.__watch__))
+        old = {path: sig for path, sig in old.items() if sig is not None}
+        changed, removed = diff(old, new)
+        for path in removed:
+            del self.state[path]
+        for path in changed:
+            self.state[path] = new[path]
+        return changed, removed
+
+    def __dirty__(self, events) -> set[str]:
+        dirty = set()
+        for directory, name, mask in events:
+            path = os.path.join(directory, name) if name else directory
+            if path == self.template_path:
+                dirty.add(path)
+            if directory not in self.dirs:
+                continue
+            dirty.add(directory)
+            if mask & notify.IN_ISDIR:
+                dirty.add(path)
+        return dirty
+
+    def __wait_notified__(self) -> tuple[set[str], set[str]]:
+        # Blocks until the first event, then keeps collecting until the tree
+        # has been quiet for one debounce window.
+        timeout, dirty, overflowed = None, set(), False
+        while True:
+            events = self.notifier.read(timeout)
+            if events is None:
+                # The kernel dropped events; only a full scan can tell what
+                # changed.
+                overflowed, timeout = True, self.debounce
+                continue
+            more = self.__dirty__(events)
+            if len(more) != 0:
+                dirty |= more
+                timeout = self.debounce
+                continue
+            if timeout is None:
+                continue
+            if overflowed:
+                changed, removed = self.poll()
+            else:
+                changed, removed = self.__rescan__(dirty)
+            if len(changed) != 0 or len(removed) != 0:
+                return changed, removed
+            timeout, dirty, overflowed = None, set(), False
+
+    def wait_for_changes(self) -> tuple[set[str], set[str]]:
+        if self.notifier is not None:
+            return self.__wait_notified__()
+
+        changed, removed = self.poll()
+        while len(changed) == 0 and len(removed) == 0:
+            time.sleep(max(self.interval, self.scan_time * POLL_COST_RATIO))
+            changed, removed = self.poll()
+
+        # Editors often write a file several times in a row; keep collecting
+        # until the tree has been quiet for one debounce window.
+        while True:
+            time.sleep(self.debounce)
+            more_changed, more_removed = self.poll()
+            if len(more_changed) == 0 and len(more_removed) == 0:
+                break
+            changed = (changed - more_removed) | more_changed
+            removed = (removed - more_changed) | more_removed
+        return changed, removed
+
+    def __asset_destination__(self, path: str) -> str:
+        return os.path.join(self.out_dir, os.path.relpath(path, self.static_dir))
+
+    def __is_page__(self, path: str) -> bool:
+        rel = os.path.relpath(path, self.content_dir)
+        return discover.is_page(rel, self.include, self.exclude)
+
+    def rebuild(self, changed: set[str], removed: set[str]) -> int:
+        pages = set()
+        if self.template_path in changed:
+            pages = {
+                frm
+                for frm, _ in site.collect_pages(
+                    self.content_dir, "", self.include, self.exclude
+                )
+            }
+
+        for path in sorted(removed):
+            if __is_under__(path, self.content_dir):
+                # Only pages have an output of their own; any other file
+                # under content maps onto a path it never generated.
+                if not self.__is_page__(path):
+                    continue
+                dest = page_destination(self.content_dir, self.out_dir, path)
+            elif __is_under__(path, self.static_dir):
+                dest = self.__asset_destination__(path)
+            else:
+                continue
+            if os.path.isfile(dest):
+                os.remove(dest)
+
+        for path in sorted(changed):
+            if __is_under__(path, self.content_dir):
+                if self.__is_page__(path):
+                    pages.add(path)
+            elif __is_under__(path, self.static_dir):
+                dest = self.__asset_destination__(path)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                assets.sync_file(path, dest)
+
+        for path in sorted(pages):
+            dest = page_destination(self.content_dir, self.out_dir, path)
+            try:
+                site.generate_page(path, self.template_path, dest)
+            except Exception as e:
+                print(f"Failed to generate page from {path}: {e}")
+        return len(pages)
+
+    def run(self):
+        print(f"Watching {', '.join(self.paths)} for changes...")
+        try:
+            while True:
+                changed, removed = self.wait_for_changes()
+                start = time.perf_counter()
+                rendered = self.rebuild(changed, removed)
+                elapsed = (time.perf_counter() - start) * 1000
+                print(
+                    f"Rebuilt {rendered} page(s) for {len(changed) + len(removed)} change(s) in {elapsed:.1f} ms"
+                )
+        finally:
+            self.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Rebuild pages as their sources change."
+    )
+    parser.add_argument("--content", default="./content")
+    parser.add_argument("--template", default="./template.html")
+    parser.add_argument("--static", default="./static")
+    parser.add_argument("--out", default="./public")
+    parser.add_argument("--include", action="append", default=None)
+    parser.add_argument("--exclude", action="append", default=[])
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.02,
+        help="shortest time in seconds between polls when inotify is unavailable",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.03,
+        help="quiet period in seconds before a burst of saves is rebuilt",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    watcher = Watcher(
+        args.content,
+        args.template,
+        args.static,
+        args.out,
+        args.interval,
+        args.debounce,
+        args.include or discover.DEFAULT_INCLUDE,
+        args.exclude,
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import queue
+import threading
+import uuid
+
+
+def atomic_write(path: str, write, binary: bool = False):
+    # The page only appears under its final name once it is complete, so a
+    # build that dies half way never leaves a torn file behind.
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "wb" if binary else "w") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class OutputWriter:
+    # on_written(path) is called from the writer thread once a page is in
+    # place under its final name.
+    def __init__(self, threads: int = 4, queue_size: int = 64, on_written=None):
+        self.on_written = on_written
+        self.__queue__: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.__dirs__: set[str] = set()
+        self.errors: list[str] = []
+        self.written = 0
+        self.__lock__ = threading.Lock()
+        self.__threads__ = [
+            threading.Thread(target=self.__drain__, daemon=True) for _ in range(threads)
+        ]
+        for thread in self.__threads__:
+            thread.start()
+
+    def __ensure_dir__(self, directory: str):
+        if directory in self.__dirs__:
+            return
+        os.makedirs(directory, exist_ok=True)
+        self.__dirs__.add(directory)
+
+    def __drain__(self):
+        while True:
+            item = self.__queue__.get()
+            if item is None:
+                return
+            path, html = item
+            try:
+                self.__ensure_dir__(os.path.dirname(path))
+                atomic_write(path, lambda f: f.write(html))
+                with self.__lock__:
+                    self.written += 1
+                if self.on_written is not None:
+                    self.on_written(path)
+            except Exception as e:
+                with self.__lock__:
+                    self.errors.append(f"Failed to write {path}: {e}")
+
+    def submit(self, path: str, html: str):
+        self.__queue__.put((path, html))
+
+    def close(self):
+        for _ in self.__threads__:
+            self.__queue__.put(None)
+        for thread in self.__threads__:
+            thread.join()
+        if len(self.errors) != 0:
+            raise Exception(self.errors[0])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+            return
+        # Let queued pages finish, but report the original failure.
+        try:
+            self.close()
+        except Exception:
+            pass
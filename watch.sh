@@ -0,0 +1,4 @@
+python3 src/main.py --incremental
+python3 src/watch.py &
+trap 'kill $!' EXIT
+python3 -m http.server 8888 --directory ./public